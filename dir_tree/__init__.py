@@ -1,4 +1,5 @@
 # dir_tree/__init__.py
 
 from .directory_tree import DirectoryTree
+from .matcher import ExclusionMatcher
 from .preferences import Preferences
\ No newline at end of file
@@ -0,0 +1,187 @@
+# dir_tree/analytics.py
+
+"""
+Size and structure statistics collected during a traversal.
+
+`SummarySink` stores file sizes, entry depths and extension ids in typed
+arrays while the tree is walked, instead of building the nested dict and
+looping over it afterwards. `summary()` then computes all aggregates in
+batches: with NumPy installed the arrays are viewed as NumPy arrays without
+copying and reduced with vectorized operations (top-k via argpartition);
+without NumPy the same results are computed in pure Python.
+
+Example:
+    >>> sink = SummarySink()
+    >>> DirectoryTree(".").walk([sink])
+    >>> sink.summary(top_n=5)["largest_files"]
+"""
+
+import heapq
+from array import array
+from typing import Any, Dict, List, Optional
+
+from .entries import ScanEntry, KIND_DIR, KIND_FILE, file_extension, format_size
+from .renderers import TreeSink
+
+try:
+    import numpy as np
+except ImportError: # NumPy ist optional
+    np = None
+
+PERCENTILES = (50, 90, 99)
+
+
+class SummarySink(TreeSink):
+    """
+    Renderer that collects sizes, depths and extensions into typed arrays.
+
+    Only files with a known size contribute to size statistics; every entry
+    contributes to the per-depth counts.
+    """
+    needs_size = True
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        """
+        Args:
+            use_numpy: Force (True) or disable (False) NumPy; None = use it if installed
+        """
+        if use_numpy and np is None:
+            raise ValueError("use_numpy=True but NumPy is not installed")
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        self.sizes = array("q")       # Dateigrößen
+        self.ext_ids = array("I")     # Index in self.extensions, parallel zu sizes
+        self.depths = array("I")      # Tiefe jedes Eintrags
+        self.paths: List[str] = []    # Relativer Pfad, parallel zu sizes (für top-k)
+        self.extensions: List[str] = []
+        self._ext_index: Dict[str, int] = {}
+        self.dirs = 0
+        self.files = 0
+        self.other = 0
+
+    def visit(self, entry: ScanEntry) -> None:
+        self.depths.append(entry.depth)
+        if entry.kind == KIND_FILE:
+            self.files += 1
+            if entry.size is None:
+                return
+            ext = file_extension(entry.name)
+            ext_id = self._ext_index.get(ext)
+            if ext_id is None:
+                ext_id = self._ext_index[ext] = len(self.extensions)
+                self.extensions.append(ext)
+            self.sizes.append(entry.size)
+            self.ext_ids.append(ext_id)
+            self.paths.append(entry.path)
+        elif entry.kind == KIND_DIR:
+            self.dirs += 1
+        else:
+            self.other += 1
+
+    def summary(self, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Compute the aggregates.
+
+        Returns:
+            Dict with entry counts, total size, size percentiles (nearest rank),
+            a log2 size histogram, the `top_n` largest files (equal sizes in
+            tree order), per-extension
+            counts and sizes, and entry counts per depth
+        """
+        if self.use_numpy:
+            aggregates = self._aggregate_numpy(top_n)
+        else:
+            aggregates = self._aggregate_python(top_n)
+        total, ordered_sizes, buckets, top, ext_counts, ext_sizes, depth_counts = aggregates
+
+        n = len(self.sizes)
+        percentiles = {}
+        for p in PERCENTILES:
+            percentiles[f"p{p}"] = int(ordered_sizes(max(0, -(-p * n // 100) - 1))) if n else None
+        percentiles["max"] = int(ordered_sizes(n - 1)) if n else None
+
+        extensions = [
+            {"extension": self.extensions[i], "count": int(ext_counts[i]), "size": int(ext_sizes[i])}
+            for i in range(len(self.extensions))
+        ]
+        extensions.sort(key=lambda e: (-e["size"], e["extension"]))
+
+        return {
+            "files": self.files,
+            "dirs": self.dirs,
+            "other": self.other,
+            "sized_files": n,
+            "total_size": int(total),
+            "size_percentiles": percentiles,
+            "size_histogram": [
+                {"min": 0 if bucket == 0 else 1 << (bucket - 1), "max": 0 if bucket == 0 else (1 << bucket) - 1,
+                 "count": int(count)}
+                for bucket, count in enumerate(buckets) if count
+            ],
+            "largest_files": [{"path": self.paths[i], "size": int(self.sizes[i])} for i in top],
+            "extensions": extensions,
+            "depth_counts": {depth: int(count) for depth, count in enumerate(depth_counts) if count},
+        }
+
+    def _aggregate_numpy(self, top_n: int):
+        sizes = np.frombuffer(self.sizes, dtype=np.int64) if len(self.sizes) else np.zeros(0, dtype=np.int64)
+        ext_ids = np.frombuffer(self.ext_ids, dtype=np.uint32) if len(self.ext_ids) else np.zeros(0, dtype=np.uint32)
+        depths = np.frombuffer(self.depths, dtype=np.uint32) if len(self.depths) else np.zeros(0, dtype=np.uint32)
+
+        ordered = np.sort(sizes)
+        # Bucket b enthält Größen mit bit_length b, d.h. [2^(b-1), 2^b - 1]; frexp liefert genau diesen Exponenten
+        buckets = np.bincount(np.frexp(sizes.astype(np.float64))[1], minlength=1) if len(sizes) else []
+        k = min(top_n, len(sizes))
+        top = []
+        if k:
+            # k größte per argpartition; bei Gleichstand am Schwellwert die ersten in Baumreihenfolge
+            threshold = sizes[np.argpartition(sizes, len(sizes) - k)[len(sizes) - k:]].min()
+            above = np.flatnonzero(sizes > threshold)
+            candidates = np.concatenate((above, np.flatnonzero(sizes == threshold)[:k - len(above)]))
+            top = candidates[np.lexsort((candidates, -sizes[candidates]))].tolist()
+        ext_counts = np.bincount(ext_ids, minlength=len(self.extensions))
+        ext_sizes = np.bincount(ext_ids, weights=sizes, minlength=len(self.extensions))
+        depth_counts = np.bincount(depths) if len(depths) else []
+        return int(sizes.sum()), ordered.__getitem__, buckets, top, ext_counts, ext_sizes, depth_counts
+
+    def _aggregate_python(self, top_n: int):
+        sizes = self.sizes
+        ordered = sorted(sizes)
+        buckets = [0] * 65
+        for size in sizes:
+            buckets[size.bit_length()] += 1
+        while buckets and not buckets[-1]:
+            buckets.pop()
+        k = min(top_n, len(sizes))
+        top = heapq.nsmallest(k, range(len(sizes)), key=lambda i: (-sizes[i], i))
+        ext_counts = [0] * len(self.extensions)
+        ext_sizes = [0] * len(self.extensions)
+        for ext_id, size in zip(self.ext_ids, sizes):
+            ext_counts[ext_id] += 1
+            ext_sizes[ext_id] += size
+        depth_counts = [0] * (max(self.depths) + 1 if self.depths else 0)
+        for depth in self.depths:
+            depth_counts[depth] += 1
+        return sum(sizes), ordered.__getitem__, buckets, top, ext_counts, ext_sizes, depth_counts
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Render a summary() dict as human-readable text."""
+    lines = [
+        f"Files: {summary['files']}  Directories: {summary['dirs']}  Other: {summary['other']}",
+        f"Total size: {format_size(summary['total_size'])} in {summary['sized_files']} sized files",
+    ]
+    if summary["sized_files"]:
+        percentiles = "  ".join(f"{name}: {format_size(value)}" for name, value in summary["size_percentiles"].items())
+        lines += ["", "Size percentiles:", f"  {percentiles}", "", "Size histogram:"]
+        for bucket in summary["size_histogram"]:
+            lines.append(f"  {format_size(bucket['min']):>10} - {format_size(bucket['max']):>10}  {bucket['count']}")
+        lines += ["", "Largest files:"]
+        for item in summary["largest_files"]:
+            lines.append(f"  {format_size(item['size']):>10}  {item['path']}")
+        lines += ["", "Extensions (by size):"]
+        for item in summary["extensions"]:
+            lines.append(f"  {item['extension'] or '(none)':<12} {item['count']:>8}  {format_size(item['size'])}")
+    lines += ["", "Entries per depth:"]
+    for depth, count in summary["depth_counts"].items():
+        lines.append(f"  {depth:>3}  {count}")
+    return "\n".join(lines)
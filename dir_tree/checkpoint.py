@@ -0,0 +1,288 @@
+# dir_tree/checkpoint.py
+
+"""
+Checkpointing and cooperative cancellation for long scans.
+
+A checkpoint consists of two files:
+
+    PATH            state: scan options, the frontier (the traversal stack with
+                    the names still to visit in every open directory) and the
+                    length of the valid part of the journal; replaced atomically
+    PATH.journal    append-only journal of the visit/leave events delivered to
+                    the sinks so far, plus what the DirectoryTree collected along
+                    the way (listed directories, errors, mount boundaries, mtimes)
+
+Because sinks only ever see the stream of events, resuming replays the journal
+into fresh sinks (no file system access) and then continues the traversal from
+the frontier. The sinks therefore end up in the same state as in an
+uninterrupted run, whatever they build. Journal writes are appended in batches
+while scanning; only saving the state costs an fsync.
+
+Checkpoint files are written with pickle: only resume checkpoints you wrote.
+
+Example:
+    >>> cancel = CancelToken()
+    >>> tree = DirectoryTree("/archive")
+    >>> try:
+    ...     tree.scan(cancel=cancel, checkpoint=Checkpointer("/tmp/archive.ckpt"))
+    ... except ScanCancelled:
+    ...     pass # später: Checkpointer("/tmp/archive.ckpt", resume=True)
+"""
+
+import os
+import time
+import pickle
+import signal
+import threading
+from typing import Any, Dict, List, Optional
+
+from .entries import ScanEntry, KIND_MARKER
+from .renderers import TreeSink
+
+CHECKPOINT_VERSION = 3
+DEFAULT_INTERVAL = 60.0
+
+# Listen des DirectoryTree, die während des Walks wachsen und im Journal mitgeschrieben werden
+_TREE_LISTS = ("scanned_dirs", "errors", "mount_boundaries", "dir_mtimes")
+
+
+class CheckpointError(ValueError):
+    """Raised when a checkpoint is missing, invalid or was written for other scan options."""
+
+
+class ScanCancelled(Exception):
+    """Raised by DirectoryTree.walk() when its CancelToken was cancelled."""
+
+    def __init__(self, checkpoint_path: Optional[str] = None):
+        message = "Scan cancelled"
+        if checkpoint_path:
+            message += f"; resume from checkpoint {checkpoint_path}"
+        super().__init__(message)
+        self.checkpoint_path = checkpoint_path
+
+
+class CancelToken:
+    """
+    Thread-safe flag for cooperative cancellation of a scan.
+
+    The traversal checks the token between entries and stops with
+    ScanCancelled (after saving a checkpoint, if one is configured).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._previous_handlers: Dict[int, Any] = {}
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def install_signal_handlers(self, signals=(signal.SIGINT, signal.SIGTERM)) -> None:
+        """
+        Cancel on the first of the given signals instead of raising
+        KeyboardInterrupt (main thread only). A second signal goes to the
+        previous handler, so a repeated Ctrl+C still interrupts a scan that
+        is stuck in a slow directory listing. Undo with restore_signal_handlers().
+        """
+        for signum in signals:
+            previous = signal.signal(signum, self._handle_signal)
+            self._previous_handlers.setdefault(signum, previous)
+
+    def restore_signal_handlers(self) -> None:
+        """Reinstall the handlers replaced by install_signal_handlers()."""
+        for signum, previous in self._previous_handlers.items():
+            signal.signal(signum, previous)
+        self._previous_handlers = {}
+
+    def _handle_signal(self, signum: int, frame: Any) -> None:
+        if not self.cancelled:
+            self.cancel()
+            return
+        # Zweites Signal: Standardverhalten (KeyboardInterrupt bzw. Beenden)
+        previous = self._previous_handlers.get(signum, signal.SIG_DFL)
+        self.restore_signal_handlers()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            signal.raise_signal(signum)
+
+
+class _JournalSink(TreeSink):
+    """Buffers the events seen by the other sinks until the next journal write."""
+
+    def __init__(self):
+        self.events: List[Optional[ScanEntry]] = [] # ScanEntry = visit, None = leave
+
+    def visit(self, entry: ScanEntry) -> None:
+        self.events.append(entry)
+
+    def leave(self, entry: ScanEntry) -> None:
+        self.events.append(None)
+
+
+class Checkpointer:
+    """
+    Writes (or resumes from) a checkpoint during DirectoryTree.walk().
+
+    Attributes:
+        path: Path of the state file; the journal is written next to it
+        interval: Minimum number of seconds between two saved states
+        resume: If True, continue the scan recorded at `path`
+    """
+
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL, resume: bool = False):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.interval = interval
+        self.resume = resume
+        self.sink = _JournalSink()
+        self._journal = None
+        self._written = dict.fromkeys(_TREE_LISTS, 0) # Bereits ins Journal geschriebene Länge je Liste
+        self._last_save = 0.0
+        self._tree = None
+        self._options_saved: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _options(tree: Any, sinks: List[TreeSink]) -> Dict[str, Any]:
+        return {
+            "root_dir": tree.root_dir,
+            "exclude_dirs": sorted(tree.explicit_exclude_dir_names),
+            "exclude_files": sorted(tree.general_exclude_patterns),
+            "follow_symlinks_in_tree": tree.follow_symlinks_in_tree,
+            "max_depth": tree.max_depth,
+            "one_file_system": tree.one_file_system,
+            "exclude_mounts": sorted(tree.exclude_mounts),
+            "need_size": any(sink.needs_size for sink in sinks),
+            "need_stat": any(sink.needs_stat for sink in sinks),
+        }
+
+    def open(self, tree: Any, sinks: List[TreeSink]) -> Optional[List[list]]:
+        """
+        Start checkpointing the walk of `tree`. When resuming, replay the
+        journal into `sinks` and return the traversal stack to continue from;
+        otherwise return None (start at the root).
+
+        Raises:
+            CheckpointError: if the checkpoint cannot be resumed
+        """
+        self._tree = tree
+        options = self._options(tree, sinks)
+        self._last_save = time.monotonic()
+        if not self.resume:
+            try:
+                os.remove(self.path) # Alter Zustand passt nicht zum neuen Journal
+            except FileNotFoundError:
+                pass
+            self._journal = open(self.journal_path, "wb")
+            self._options_saved = options
+            return None
+
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            raise CheckpointError(f"Cannot read checkpoint {self.path}: {e}") from e
+        if not isinstance(state, dict) or state.get("version") != CHECKPOINT_VERSION:
+            raise CheckpointError(f"{self.path} is not a dir_tree checkpoint (version {CHECKPOINT_VERSION})")
+        saved = state["options"]
+        for key, value in options.items():
+            # Ein Checkpoint mit Größen/stat reicht auch für Renderer, die sie nicht brauchen
+            if saved[key] != value and not (key in ("need_size", "need_stat") and saved[key]):
+                raise CheckpointError(f"Checkpoint {self.path} was written with {key}={saved[key]!r}, "
+                                      f"this scan uses {value!r}")
+        self._options_saved = saved
+        # Weiter mit denselben Angaben wie im Journal, damit ein späterer Resume sie vollständig vorfindet
+        self.sink.needs_size = saved["need_size"]
+        self.sink.needs_stat = saved["need_stat"]
+
+        # Journal bis zum gesicherten Stand in neue Sinks abspielen
+        open_dirs: List[ScanEntry] = []
+        try:
+            self._journal = open(self.journal_path, "r+b")
+            self._journal.truncate(state["journal_size"])
+            while self._journal.tell() < state["journal_size"]:
+                events, lists = pickle.load(self._journal)
+                for name, items in zip(_TREE_LISTS, lists):
+                    getattr(tree, name).extend(items)
+                for entry in events:
+                    if entry is None:
+                        parent = open_dirs.pop()
+                        for sink in sinks:
+                            sink.leave(parent)
+                        continue
+                    for sink in sinks:
+                        sink.visit(entry)
+                    if entry.descend:
+                        open_dirs.append(entry)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            raise CheckpointError(f"Cannot read checkpoint journal {self.journal_path}: {e}") from e
+        self._written = {name: len(getattr(tree, name)) for name in _TREE_LISTS}
+        return [self._restore_frame(frame) for frame in state["frontier"]]
+
+    @staticmethod
+    def _save_frame(frame: list) -> tuple:
+        parent, dir_path, rel_dir, depth, items, index = frame
+        remaining = [(item.kind == KIND_MARKER, item.name) for item in items[index:]]
+        return parent, dir_path, rel_dir, depth, remaining
+
+    @staticmethod
+    def _restore_frame(saved: tuple) -> list:
+        parent, dir_path, rel_dir, depth, remaining = saved
+        listing: Dict[str, Any] = {}
+        if any(not is_marker for is_marker, _ in remaining):
+            try:
+                with os.scandir(dir_path) as it:
+                    listing = {item.name: item for item in it}
+            except OSError: # Verzeichnis inzwischen entfernt: verbleibende Einträge fehlen
+                pass
+        items = [name if is_marker else listing[name]
+                 for is_marker, name in remaining if is_marker or name in listing]
+        return [parent, dir_path, rel_dir, depth, items, 0]
+
+    def _write_journal(self) -> None:
+        lists = [getattr(self._tree, name)[self._written[name]:] for name in _TREE_LISTS]
+        if self.sink.events or any(lists):
+            pickle.dump((self.sink.events, lists), self._journal, pickle.HIGHEST_PROTOCOL)
+            self.sink.events = []
+            for name, items in zip(_TREE_LISTS, lists):
+                self._written[name] += len(items)
+
+    def tick(self, stack: List[list]) -> None:
+        """Called periodically by the traversal: append to the journal, save the state when due."""
+        self._write_journal()
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save(stack)
+
+    def save(self, stack: List[list]) -> None:
+        """Write the journal and atomically replace the state file."""
+        self._write_journal()
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "options": self._options_saved,
+            "journal_size": self._journal.tell(),
+            "frontier": [self._save_frame(frame) for frame in stack],
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def close(self, completed: bool) -> None:
+        """Close the journal; a completed scan removes its checkpoint files."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if completed:
+            for path in (self.path, self.journal_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
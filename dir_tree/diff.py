@@ -0,0 +1,174 @@
+# dir_tree/diff.py
+
+"""
+Structural diff between two scans of a directory tree.
+
+Both sides are read as entry streams (DirectoryTree.iter_entries() or
+Snapshot.iter_entries()). These streams are depth-first with the children of
+every directory sorted by name, which is the same as ordering by the tuple of
+path components, so a single merge walk over both streams finds every change
+in time linear in the size of the two trees.
+
+Example:
+    >>> with Snapshot("before.snap") as before, Snapshot("after.snap") as after:
+    ...     print(diff_trees(before, after).tree_print())
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from .directory_tree import DirectoryTree, TreeEntry, KIND_DIR, KIND_FILE
+
+ADDED = "added"
+REMOVED = "removed"
+RESIZED = "resized"
+RETYPED = "retyped"
+RETARGETED = "retargeted"
+
+_MARKERS = {ADDED: "[+]", REMOVED: "[-]", RESIZED: "[~]", RETYPED: "[T]", RETARGETED: "[>]"}
+
+
+class Change(NamedTuple):
+    path: str
+    change: str                # One of ADDED, REMOVED, RESIZED, RETYPED, RETARGETED
+    old: Optional[TreeEntry]
+    new: Optional[TreeEntry]
+
+
+def entry_type(entry: TreeEntry) -> str:
+    """Type label used to detect retyped entries (e.g. "file" vs. "file_symlink")."""
+    if entry.target is not None and entry.kind in (KIND_FILE, KIND_DIR):
+        return f"{entry.kind}_symlink"
+    return entry.kind
+
+
+def _root_label(source: Any) -> str:
+    if hasattr(source, "root_display_name"): # DirectoryTree
+        return source.root_display_name()
+    return getattr(source, "root_name", "")
+
+
+class TreeDiff:
+    """Result of diff_trees(): the list of changes plus renderers."""
+
+    def __init__(self, changes: List[Change], root_name: str):
+        self.changes = changes
+        self.root_name = root_name
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {kind: 0 for kind in _MARKERS}
+        for change in self.changes:
+            counts[change.change] += 1
+        return counts
+
+    @staticmethod
+    def _describe(change: Change) -> str:
+        name = change.path.rsplit("/", 1)[-1]
+        if change.change == RESIZED:
+            return (f"{name} ({DirectoryTree._format_size(change.old.size)}"
+                    f" -> {DirectoryTree._format_size(change.new.size)})")
+        if change.change == RETYPED:
+            return f"{name} ({entry_type(change.old)} -> {entry_type(change.new)})"
+        if change.change == RETARGETED:
+            return f"{name} ({change.old.target} -> {change.new.target})"
+        entry = change.new if change.change == ADDED else change.old
+        return name + ("/" if entry.kind == KIND_DIR else "")
+
+    def tree_print(self) -> str:
+        """
+        Render only the changed branches in tree_print style. Unchanged
+        entries are pruned; directories appear only as context for changes.
+        """
+        # Verschachtelte Struktur nur aus geänderten Pfaden und ihren Vorfahren
+        root: Dict[str, Any] = {}
+        for change in self.changes:
+            node = root
+            parts = change.path.split("/")
+            for part in parts[:-1]:
+                node = node.setdefault(part, [None, {}])[1]
+            node.setdefault(parts[-1], [None, {}])[0] = change
+
+        lines = [self.root_name]
+        stack = [("", list(root.items()), 0)]
+        while stack:
+            prefix, items, i = stack.pop()
+            if i >= len(items):
+                continue
+            stack.append((prefix, items, i + 1))
+            name, (change, children) = items[i]
+            is_last = i == len(items) - 1
+            connector = '└── ' if is_last else '├── '
+            label = f"{_MARKERS[change.change]} {self._describe(change)}" if change else name
+            lines.append(f"{prefix}{connector}{label}")
+            if children:
+                stack.append((prefix + ('    ' if is_last else '│   '), list(children.items()), 0))
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "root": self.root_name,
+            "counts": self.counts(),
+            "changes": [
+                {
+                    "path": change.path,
+                    "change": change.change,
+                    "old": change.old._asdict() if change.old else None,
+                    "new": change.new._asdict() if change.new else None,
+                }
+                for change in self.changes
+            ],
+        }, indent=4, ensure_ascii=False)
+
+
+def diff_trees(old: Any, new: Any) -> TreeDiff:
+    """
+    Compare two scans with a linear merge walk.
+
+    Args:
+        old: Earlier scan (DirectoryTree after scan(keep_entries=True), or Snapshot)
+        new: Later scan (DirectoryTree after scan(keep_entries=True), or Snapshot)
+
+    Returns:
+        TreeDiff listing added, removed, resized, retyped and retargeted
+        entries in tree order. Children of added or removed directories are
+        not listed separately. File sizes are compared only when known on
+        both sides; directory sizes are not compared.
+    """
+    changes: List[Change] = []
+    old_iter = old.iter_entries()
+    new_iter = new.iter_entries()
+    a = next(old_iter, None)
+    b = next(new_iter, None)
+
+    def skip_below(entry: TreeEntry, entries: Iterator[TreeEntry]) -> Optional[TreeEntry]:
+        following = next(entries, None)
+        while following is not None and following.depth > entry.depth:
+            following = next(entries, None)
+        return following
+
+    while a is not None or b is not None:
+        key_a = a.path.split("/") if a is not None else None
+        key_b = b.path.split("/") if b is not None else None
+        if key_b is None or (key_a is not None and key_a < key_b):
+            changes.append(Change(a.path, REMOVED, a, None))
+            a = skip_below(a, old_iter)
+        elif key_a is None or key_b < key_a:
+            changes.append(Change(b.path, ADDED, None, b))
+            b = skip_below(b, new_iter)
+        else:
+            if entry_type(a) != entry_type(b):
+                changes.append(Change(a.path, RETYPED, a, b))
+                # Inhalt eines zur Datei gewordenen Verzeichnisses (und umgekehrt) nicht einzeln melden
+                a = skip_below(a, old_iter) if a.kind == KIND_DIR else next(old_iter, None)
+                b = skip_below(b, new_iter) if b.kind == KIND_DIR else next(new_iter, None)
+                continue
+            if a.target != b.target:
+                changes.append(Change(a.path, RETARGETED, a, b))
+            elif a.kind == KIND_FILE and a.size is not None and b.size is not None and a.size != b.size:
+                changes.append(Change(a.path, RESIZED, a, b))
+            a = next(old_iter, None)
+            b = next(new_iter, None)
+    return TreeDiff(changes, _root_label(new))
@@ -1,17 +1,37 @@
 import os
-import fnmatch
+import sys
+import errno
 import json
+import copy
 import argparse
-from typing import List, Set, Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Set, Dict, Optional, Any, Callable, Iterable, Iterator, Tuple
+from .entries import (TreeEntry, ScanEntry, KIND_DIR, KIND_FILE, KIND_DIR_SYMLINK, KIND_MARKER,
+                      MARKER_PERMISSION_DENIED, MARKER_NOT_FOUND, MARKER_ERROR,
+                      ScanError, PHASE_LIST, PHASE_STAT, PHASE_SIZE, PHASE_TYPE,
+                      describe_symlink, format_size)
+from .matcher import ExclusionMatcher
+from .mounts import excluded_mount_points, mount_point_ids
 from .preferences import Preferences # Stellt sicher, dass preferences.py im selben Paket ist
+from .renderers import TreeSink, TreeDictSink, TreeEntrySink, TreePrintSink, RENDERERS, COMPRESSIONS, open_output
+from .checkpoint import CancelToken, Checkpointer, CheckpointError, ScanCancelled, DEFAULT_INTERVAL
+from .progress import ScanProgress, ProgressTracker, ProgressPrinter, DEFAULT_PROGRESS_INTERVAL
 
 
 class DirectoryTree:
+    tick_entries = 1024 # Abstand (in Einträgen) zwischen Prüfungen auf Abbruch, Checkpoints und Fortschritt
+
     def __init__(self, root_dir: str,
                  exclude_dirs: Optional[Set[str]] = None,
                  exclude_files: Optional[Set[str]] = None,
                  follow_symlinks_in_tree: bool = False,
-                 show_file_sizes: bool = False):
+                 show_file_sizes: bool = False,
+                 max_depth: Optional[int] = None,
+                 matcher: Optional[ExclusionMatcher] = None,
+                 detect_duplicates: bool = False,
+                 strict: bool = False,
+                 one_file_system: bool = False,
+                 exclude_mounts: Optional[Set[str]] = None):
         """
         Initialize DirectoryTree.
         
@@ -22,16 +42,46 @@ class DirectoryTree:
             follow_symlinks_in_tree: Whether to follow symbolic links to directories
             show_file_sizes: If True, display human-readable file sizes next to 
                            file names in the tree output (e.g., "file.txt (1.2 KB)")
+            max_depth: If set, directories deeper than this many levels below
+                       root_dir are listed but not descended into (None = unlimited)
+            matcher: Precompiled ExclusionMatcher to use instead of compiling
+                     exclude_dirs/exclude_files (lets several trees share one)
+            detect_duplicates: If True, scan() also finds files with identical
+                               content (see dir_tree.duplicates), marks them in
+                               tree_print and lists them in the JSON output
+            strict: If True, the first OSError (listing a directory, reading a
+                    size or stat) aborts the scan; by default such errors are
+                    recorded in `errors` and the scan continues
+            one_file_system: If True, directories on another device than
+                             root_dir (mount points) are listed but not descended into
+            exclude_mounts: Mount points and/or filesystem types (e.g. "nfs4",
+                            "proc") whose mount points are left out entirely
         """
         self.root_dir = os.path.abspath(root_dir)
         # `exclude_dirs` von 4gpt ist jetzt immer ein leeres Set.
         # Alle Muster (für Dateien und Verzeichnisse) kommen über `exclude_files`.
         self.explicit_exclude_dir_names = exclude_dirs if exclude_dirs is not None else set()
         self.general_exclude_patterns = exclude_files if exclude_files is not None else set()
+        self.matcher = matcher if matcher is not None else \
+            ExclusionMatcher(self.explicit_exclude_dir_names, self.general_exclude_patterns)
         self.follow_symlinks_in_tree = follow_symlinks_in_tree
         self.show_file_sizes = show_file_sizes
+        self.max_depth = max_depth
+        self.detect_duplicates = detect_duplicates
+        self.strict = strict
+        self.one_file_system = one_file_system
+        self.exclude_mounts = exclude_mounts if exclude_mounts is not None else set()
+        self.mount_boundaries: List[str] = [] # Nicht betretene Mountpunkte des letzten Scans (one_file_system)
+        self._root_dev: Optional[int] = None
+        self._excluded_mount_ids: Set[Tuple[int, int]] = set()
+        self.errors: List[ScanError] = [] # Fehler des letzten Scans (nur ohne strict)
+        self.duplicates = [] # DuplicateGroup-Liste des letzten scan() mit detect_duplicates
         self.tree = {}
+        self.entries: Optional[List[TreeEntry]] = None # Einträge des letzten scan(keep_entries=True)
         self.tree_print_lines = [] # Zum Sammeln der Ausgabezeilen für tree_print
+        self.scanned_dirs = [] # Alle gelisteten Verzeichnisse
+        self.track_dir_mtimes = False # Für den Daemon: mtime jedes Verzeichnisses vor dem Listen festhalten
+        self.dir_mtimes: List[Tuple[str, int]] = [] # (Verzeichnis, st_mtime_ns) bei track_dir_mtimes, -1 = unbekannt
 
         # DEBUG: Zeige, welche Exclude-Patterns bei der Initialisierung ankommen
         # print(f"[DIR_TREE INIT] root_dir: {self.root_dir}")
@@ -40,24 +90,12 @@ class DirectoryTree:
         # print(f"[DIR_TREE INIT] follow_symlinks_in_tree: {self.follow_symlinks_in_tree}")
 
     def _should_be_excluded(self, item_name: str, item_path: str) -> bool:
-        # print(f"[DIR_TREE EXCLUDE CHECK] Item: '{item_name}', Path: '{item_path}'")
-
         # 1. Explizite Verzeichnisnamen-Ausschlüsse (wird von 4gpt nicht genutzt, da exclude_dirs=set() übergeben wird)
-        if os.path.isdir(item_path) and item_name in self.explicit_exclude_dir_names:
-            # print(f"  -> EXCLUDED (explicit dir name): {item_name}")
-            return True
-
-        # 2. Allgemeine Muster-Ausschlüsse (fnmatch auf item_name)
-        #    Diese Muster gelten für Datei- UND Verzeichnisnamen.
-        for pattern in self.general_exclude_patterns:
-            if fnmatch.fnmatch(item_name, pattern):
-                # print(f"  -> EXCLUDED (general pattern '{pattern}' matched '{item_name}')")
-                return True
-        
-        # print(f"  -> NOT EXCLUDED: {item_name}")
-        return False
+        # 2. Allgemeine Muster-Ausschlüsse (fnmatch auf item_name), gelten für Datei- UND Verzeichnisnamen.
+        return self.matcher.is_excluded(item_name, item_path)
 
-    def _format_size(self, size_bytes: int) -> str:
+    @staticmethod
+    def _format_size(size_bytes: int) -> str:
         """
         Convert bytes to human-readable format.
         
@@ -77,96 +115,352 @@ class DirectoryTree:
             >>> self._format_size(5242880)
             '5.0 MB'
         """
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} TB"
+        return format_size(size_bytes)
+
+    _describe_symlink = staticmethod(describe_symlink)
 
-    def build_tree_recursive(self, current_dir: str, prefix: str = '') -> Dict[str, Any]:
-        tree_structure = {}
+    def _record_error(self, path: str, phase: str, exc: OSError) -> None:
+        if self.strict:
+            raise exc
+        self.errors.append(ScanError.from_exception(path, phase, exc))
+
+    def _checked(self, path: str, phase: str, lookup: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call `lookup`; on OSError record a ScanError and return None (slow path only)."""
         try:
-            items_in_dir = os.listdir(current_dir)
-        except PermissionError:
-            self.tree_print_lines.append(f"{prefix}└── [Permission Denied]")
-            return {"[Permission Denied]": None}
-        except FileNotFoundError: # z.B. wenn current_dir ein broken symlink war
-            self.tree_print_lines.append(f"{prefix}└── [Directory Not Found or Broken Symlink Target]")
-            return {"[Directory Not Found or Broken Symlink Target]": None}
-
-        processable_items = []
-        for item_name in items_in_dir:
-            item_path = os.path.join(current_dir, item_name)
-            if not self._should_be_excluded(item_name, item_path):
-                processable_items.append(item_name)
-        
-        processable_items.sort()
+            return lookup(*args, **kwargs)
+        except OSError as e:
+            self._record_error(path, phase, e)
+            return None
 
-        for i, item_name in enumerate(processable_items):
-            item_path = os.path.join(current_dir, item_name)
-            is_last_item = (i == len(processable_items) - 1)
-            connector = '└── ' if is_last_item else '├── '
-            
-            entry_display_name = item_name
-            is_symlink = os.path.islink(item_path)
-            symlink_target_info = "" # Für die JSON-Struktur, falls es ein nicht gefolgter Symlink ist
-
-            if is_symlink:
-                try:
-                    target_path = os.readlink(item_path)
-                    # Versuche, den Zielpfad relativ zum Symlink-Verzeichnis darzustellen
-                    try:
-                        # realpath löst alle Symlinks im Pfad auf, um den kanonischen Pfad zu erhalten
-                        resolved_target_path = os.path.realpath(item_path)
-                        # relpath vom Verzeichnis des Symlinks zum aufgelösten Ziel
-                        relative_target = os.path.relpath(resolved_target_path, os.path.dirname(item_path))
-                        entry_display_name += f" -> {relative_target}"
-                        symlink_target_info = relative_target
-                    except ValueError: # z.B. Pfade auf unterschiedlichen Laufwerken (Windows)
-                        entry_display_name += f" -> {target_path}"
-                        symlink_target_info = str(target_path)
-                except OSError: # Fehler beim Lesen des Symlink-Ziels (z.B. broken symlink)
-                    entry_display_name += " -> [Broken Symlink]"
-                    symlink_target_info = "[Broken Symlink]"
-
-            is_target_a_directory = os.path.isdir(item_path) # os.path.isdir folgt Symlinks!
-
-            if is_target_a_directory:
-                # Wenn es ein Symlink zu einem Verzeichnis ist UND wir Symlinks NICHT folgen sollen
-                if is_symlink and not self.follow_symlinks_in_tree:
-                    self.tree_print_lines.append(f"{prefix}{connector}{entry_display_name}")
-                    tree_structure[item_name] = {"symlink_target": symlink_target_info, "_type": "dir_symlink_no_follow"}
-                else: # Reguläres Verzeichnis oder Symlink zu Verzeichnis, dem wir folgen
-                    # Wenn wir folgen, zeigen wir nur den Linknamen (oder originalen Namen) im Baum
-                    self.tree_print_lines.append(f"{prefix}{connector}{item_name if not is_symlink else entry_display_name.split(' -> ')[0]}")
-                    new_prefix = prefix + ('    ' if is_last_item else '│   ')
-                    tree_structure[item_name] = self.build_tree_recursive(item_path, new_prefix)
-            else: # Datei, Symlink zu Datei oder etwas, das kein Verzeichnis ist
-                final_display = entry_display_name
-                
-                if self.show_file_sizes:
-                    try:
-                        # os.path.getsize() follows symlinks automatically
-                        # This shows target file size, not symlink size
-                        size = os.path.getsize(item_path)
-                        size_str = self._format_size(size)
-                        final_display += f" ({size_str})"
-                    except (OSError, IOError):
-                        # Graceful degradation for:
-                        # - Permission denied
-                        # - File deleted during scan
-                        # - Broken symlinks
-                        pass
-                
-                self.tree_print_lines.append(f"{prefix}{connector}{final_display}")
-                tree_structure[item_name] = None # Repräsentiert eine Datei oder ein Blatt im Baum
-
-        return tree_structure
+    def _list_dir(self, current_dir: str) -> List[Any]:
+        """
+        Return the non-excluded entries of current_dir sorted by name, or a
+        single marker name if the directory cannot be listed.
+        """
+        if self.track_dir_mtimes:
+            # Vor dem Listen: Änderungen während oder nach dem Listen machen den Stand damit sicher ungültig
+            try:
+                mtime = os.stat(current_dir).st_mtime_ns
+            except OSError:
+                mtime = -1
+        try:
+            with os.scandir(current_dir) as it:
+                items = [item for item in it if not self._should_be_excluded(item.name, item.path)]
+        except OSError as e:
+            self._record_error(current_dir, PHASE_LIST, e)
+            if isinstance(e, PermissionError):
+                return [MARKER_PERMISSION_DENIED]
+            if isinstance(e, FileNotFoundError): # z.B. wenn current_dir ein broken symlink war
+                return [MARKER_NOT_FOUND]
+            return [MARKER_ERROR] # ELOOP, ENAMETOOLONG, ESTALE, ...
+        self.scanned_dirs.append(current_dir)
+        if self.track_dir_mtimes:
+            self.dir_mtimes.append((current_dir, mtime))
+        if self._excluded_mount_ids:
+            items = [item for item in items if not self._is_excluded_mount(item)]
+        items.sort(key=lambda item: item.name)
+        return items
 
-    def to_json(self) -> str:
-        self.tree_print_lines = [] # Zurücksetzen für den Fall mehrmaliger Aufrufe
-        self.tree = self.build_tree_recursive(self.root_dir)
-        
+    def _is_excluded_mount(self, item: Any) -> bool:
+        """
+        True if `item` is a directory the scan would enter whose (st_dev, st_ino)
+        is one of the excluded mount points.
+        """
+        try:
+            if item.is_symlink() and not self.follow_symlinks_in_tree:
+                return False # Wird ohnehin nicht betreten
+            if not item.is_dir():
+                return False
+            st = item.stat() # DirEntry merkt sich das Ergebnis für _make_entry
+        except OSError:
+            return False # Wird beim Aufbau des Eintrags als Fehler erfasst
+        return (st.st_dev, st.st_ino) in self._excluded_mount_ids
+
+    def _make_entry(self, item: Any, rel_dir: str, depth: int, is_last: bool,
+                    need_size: bool, need_stat: bool = False, checked: bool = False) -> ScanEntry:
+        """
+        Build the ScanEntry for a DirEntry (or marker name). Without `checked`
+        OSErrors propagate (fast path, see _make_entries); with `checked` each
+        lookup is guarded and failures are recorded in `errors`.
+        """
+        if isinstance(item, str): # Platzhalter für nicht lesbare Verzeichnisse
+            rel_path = f"{rel_dir}/{item}" if rel_dir else item
+            return ScanEntry(rel_path, item, depth, KIND_MARKER, None, None, "", is_last, False)
+
+        item_name = item.name
+        item_path = item.path
+        rel_path = f"{rel_dir}/{item_name}" if rel_dir else item_name
+        if checked:
+            is_symlink = bool(self._checked(item_path, PHASE_TYPE, item.is_symlink))
+        else:
+            is_symlink = item.is_symlink()
+        symlink_target_info = self._describe_symlink(item_path) if is_symlink else None
+        lstat = None
+        if need_stat:
+            if checked:
+                lstat = self._checked(item_path, PHASE_STAT, item.stat, follow_symlinks=False)
+            else:
+                lstat = item.stat(follow_symlinks=False) # Ein lstat-Aufruf; DirEntry merkt sich das Ergebnis
+
+        # DirEntry.is_dir() folgt Symlinks, wie os.path.isdir (None: Typ nicht ermittelbar)
+        if checked:
+            is_dir = self._checked(item_path, PHASE_TYPE, self._entry_is_dir, item, is_symlink)
+        else:
+            is_dir = self._entry_is_dir(item, is_symlink)
+        if is_dir:
+            # Symlink zu einem Verzeichnis, dem wir NICHT folgen sollen
+            if is_symlink and not self.follow_symlinks_in_tree:
+                return ScanEntry(rel_path, item_name, depth, KIND_DIR_SYMLINK, None, symlink_target_info,
+                                 item_path, is_last, False, lstat)
+            # Reguläres Verzeichnis oder Symlink zu Verzeichnis, dem wir folgen
+            descend = self.max_depth is None or depth < self.max_depth
+            mount_boundary = False
+            if descend and self._root_dev is not None:
+                # stat() folgt Symlinks; bei Nicht-Symlinks ohne Systemaufruf, falls lstat oben schon geholt wurde
+                st = self._checked(item_path, PHASE_STAT, item.stat) if checked else item.stat()
+                # Mountgrenze; in mount_boundaries erst beim Besuch (der langsame Pfad baut Einträge neu).
+                # Ist stat fehlgeschlagen, steht das schon in errors: kein Grund, eine Grenze anzunehmen
+                mount_boundary = st is not None and st.st_dev != self._root_dev
+                descend = not mount_boundary
+            return ScanEntry(rel_path, item_name, depth, KIND_DIR, None, symlink_target_info,
+                             item_path, is_last, descend, lstat, mount_boundary)
+
+        # Datei, Symlink zu Datei oder etwas, das kein Verzeichnis ist
+        size = None
+        if need_size:
+            # stat() folgt Symlinks: Größe des Ziels, nicht des Symlinks
+            if lstat is not None and not is_symlink:
+                size = lstat.st_size
+            else:
+                if checked:
+                    # Permission denied, während des Scans gelöschte Dateien, ...
+                    st = self._checked(item_path, PHASE_SIZE, self._target_stat, item, is_symlink) \
+                        if is_dir is not None else None
+                else:
+                    st = self._target_stat(item, is_symlink)
+                size = st.st_size if st is not None else None
+        return ScanEntry(rel_path, item_name, depth, KIND_FILE, size, symlink_target_info,
+                         item_path, is_last, False, lstat)
+
+    @staticmethod
+    def _entry_is_dir(item: Any, is_symlink: bool) -> bool:
+        """is_dir() following symlinks; a symlink loop is no directory, like a broken symlink."""
+        try:
+            return item.is_dir()
+        except OSError as e:
+            if is_symlink and e.errno == errno.ELOOP:
+                return False
+            raise
+
+    @staticmethod
+    def _target_stat(item: Any, is_symlink: bool) -> Optional[os.stat_result]:
+        """
+        stat() following symlinks; None for a broken symlink or a symlink loop,
+        which are valid entries without size.
+        """
+        try:
+            return item.stat()
+        except OSError as e:
+            if is_symlink and (isinstance(e, FileNotFoundError) or e.errno == errno.ELOOP):
+                return None
+            raise
+
+    def _make_entries(self, items: List[Any], rel_dir: str, depth: int,
+                      need_size: bool, need_stat: bool) -> List[ScanEntry]:
+        """
+        Build the entries of one directory. One exception handler covers the
+        whole directory; only if a lookup fails is the directory rebuilt on
+        the slow path that guards and records every lookup separately.
+        """
+        last = len(items) - 1
+        try:
+            return [self._make_entry(item, rel_dir, depth, i == last, need_size, need_stat)
+                    for i, item in enumerate(items)]
+        except OSError:
+            return [self._make_entry(item, rel_dir, depth, i == last, need_size, need_stat, checked=True)
+                    for i, item in enumerate(items)]
+
+    def _walk(self, sinks: List[TreeSink], start_dir: str, start_depth: int = 0,
+              stack: Optional[List[list]] = None, on_tick: Optional[Callable[[List[list]], None]] = None,
+              on_list: Optional[Callable[[str, List[list]], None]] = None) -> None:
+        need_size = any(sink.needs_size for sink in sinks)
+        need_stat = any(sink.needs_stat for sink in sinks)
+        self._root_dev = None
+        if self.one_file_system:
+            try:
+                self._root_dev = os.stat(self.root_dir).st_dev
+            except OSError:
+                pass # Der Scan liefert den üblichen Fehlereintrag
+        self._excluded_mount_ids = mount_point_ids(excluded_mount_points(self.exclude_mounts)) \
+            if self.exclude_mounts else set()
+        # Iterative Tiefensuche: [Verzeichnis-Eintrag, Pfad, relativer Pfad, Tiefe, Einträge, Index]
+        if stack is None:
+            if on_list is not None:
+                on_list(start_dir, [])
+            stack = [[None, start_dir, "", start_depth, self._list_dir(start_dir), 0]]
+        for frame in stack: # Neue oder aus einem Checkpoint wiederhergestellte Frames enthalten DirEntry-Objekte
+            frame[4] = self._make_entries(frame[4][frame[5]:], frame[2], frame[3] + 1, need_size, need_stat)
+            frame[5] = 0
+        check_mounts = self._root_dev is not None
+        countdown = self.tick_entries
+        while stack:
+            if on_tick is not None:
+                countdown -= 1
+                if not countdown: # Stack ist hier konsistent: alle bisherigen Einträge sind zugestellt
+                    countdown = self.tick_entries
+                    on_tick(stack)
+            frame = stack[-1]
+            parent, dir_path, rel_dir, depth, entries, index = frame
+            if index >= len(entries):
+                stack.pop()
+                if parent is not None:
+                    for sink in sinks:
+                        sink.leave(parent)
+                continue
+            frame[5] = index + 1
+            entry = entries[index]
+            for sink in sinks:
+                sink.visit(entry)
+            if check_mounts and entry.mount_boundary:
+                self.mount_boundaries.append(entry.abs_path)
+            if entry.descend:
+                if on_list is not None: # Vor dem Listen, damit ein hängendes Listing den richtigen Pfad zeigt
+                    on_list(entry.abs_path, stack)
+                children = self._make_entries(self._list_dir(entry.abs_path), entry.path, depth + 2,
+                                              need_size, need_stat)
+                stack.append([entry, entry.abs_path, entry.path, depth + 1, children, 0])
+
+    def walk(self, sinks: Iterable[TreeSink],
+             cancel: Optional[CancelToken] = None,
+             checkpoint: Optional[Checkpointer] = None,
+             progress: Optional[Callable[[ScanProgress], None]] = None,
+             progress_interval: float = DEFAULT_PROGRESS_INTERVAL) -> None:
+        """
+        Traverse root_dir once and feed every entry to all `sinks`.
+
+        Entries arrive depth-first with the children of each directory sorted
+        by name (the tree_print order). See dir_tree.renderers for the
+        available sinks.
+
+        Args:
+            sinks: Renderers to feed
+            cancel: Token checked between entries; once cancelled, the walk
+                    saves the checkpoint (if any) and raises ScanCancelled
+            checkpoint: Checkpointer that periodically saves the progress, or
+                        resumes a saved scan (see dir_tree.checkpoint)
+            progress: Called with a ScanProgress at most every `progress_interval`
+                      seconds (checked before each directory listing and every
+                      `tick_entries` entries) and once at the end (see dir_tree.progress)
+            progress_interval: Minimum number of seconds between two progress reports
+
+        Raises:
+            ScanCancelled: if `cancel` was cancelled before the walk finished
+            OSError: with `strict`, the first error met during the walk
+            CheckpointError: if `checkpoint` cannot be resumed
+        """
+        sinks = list(sinks)
+        self.scanned_dirs = []
+        self.dir_mtimes = []
+        self.errors = []
+        self.mount_boundaries = []
+        for sink in sinks:
+            sink.start(self)
+
+        stack = None
+        walk_sinks = sinks
+        if checkpoint is not None:
+            stack = checkpoint.open(self, sinks)
+            walk_sinks = walk_sinks + [checkpoint.sink]
+        tracker = ProgressTracker(progress, progress_interval) if progress is not None else None
+        if tracker is not None:
+            walk_sinks = walk_sinks + [tracker.sink]
+
+        def tick(stack: List[list]) -> None:
+            if tracker is not None:
+                tracker.tick(self, stack)
+            if checkpoint is not None:
+                checkpoint.tick(stack)
+            if cancel is not None and cancel.cancelled:
+                if checkpoint is not None:
+                    checkpoint.save(stack)
+                raise ScanCancelled(checkpoint.path if checkpoint is not None else None)
+
+        completed = False
+        try:
+            self._walk(walk_sinks, self.root_dir, stack=stack,
+                       on_tick=tick if cancel is not None or checkpoint is not None or tracker is not None else None,
+                       on_list=(lambda path, stack: tracker.listing(self, path, stack)) if tracker is not None else None)
+            completed = True
+        finally:
+            if checkpoint is not None:
+                checkpoint.close(completed)
+        if tracker is not None:
+            tracker.finish(self)
+        for sink in sinks:
+            sink.finish(self)
+
+    def build_tree_recursive(self, current_dir: str, prefix: str = '', depth: int = 0) -> Dict[str, Any]:
+        """
+        Build the nested dict for current_dir and append its tree_print lines.
+        Kept for backwards compatibility; scan() and walk() are the entry points.
+        """
+        dict_sink = TreeDictSink()
+        print_sink = TreePrintSink(self.show_file_sizes, prefix)
+        self._walk([dict_sink, print_sink], current_dir, depth)
+        self.tree_print_lines.extend(print_sink.lines)
+        return dict_sink.tree
+
+    def scan(self, build_dict: bool = True, keep_entries: bool = False, **walk_options: Any) -> Dict[str, Any]:
+        """
+        Scan root_dir and populate `tree`, `tree_print_lines` and `scanned_dirs`
+        (and `entries` if keep_entries is set, `duplicates` if detect_duplicates is set).
+
+        Args:
+            build_dict: If False, only tree_print is built and `tree` stays empty
+            keep_entries: If True, also keep a TreeEntry (with file size) per entry
+                          in `entries` for iter_entries(), e.g. for diffs, queries
+                          and snapshots; costs a size lookup per file
+            **walk_options: `cancel`, `checkpoint`, `progress` and `progress_interval`,
+                            passed on to walk()
+
+        Returns:
+            The nested tree dictionary (also stored in `self.tree`)
+        """
+        print_sink = TreePrintSink(self.show_file_sizes)
+        sinks: List[TreeSink] = [print_sink]
+        dict_sink = TreeDictSink() if build_dict else None
+        if dict_sink is not None:
+            sinks.append(dict_sink)
+        entry_sink = TreeEntrySink() if keep_entries else None
+        if entry_sink is not None:
+            sinks.append(entry_sink)
+        duplicate_sink = None
+        if self.detect_duplicates:
+            from .duplicates import DuplicateSink
+            duplicate_sink = DuplicateSink()
+            sinks.append(duplicate_sink)
+        self.walk(sinks, **walk_options)
+        self.tree = dict_sink.tree if dict_sink is not None else {}
+        self.entries = entry_sink.entries if entry_sink is not None else None
+        self.tree_print_lines = print_sink.lines
+        if duplicate_sink is not None:
+            self.duplicates = duplicate_sink.groups()
+            # Zeile einer Datei = ihre Position in der Besuchsreihenfolge
+            for number, group in enumerate(self.duplicates, 1):
+                for path in group.paths:
+                    self.tree_print_lines[duplicate_sink.ordinals[path]] += f" [duplicate #{number}]"
+        return self.tree
+
+    def error_counts(self) -> Dict[str, int]:
+        """Number of recorded errors per phase ("list", "stat", "size", "type") plus "total"."""
+        counts = {phase: 0 for phase in (PHASE_LIST, PHASE_STAT, PHASE_SIZE, PHASE_TYPE)}
+        for error in self.errors:
+            counts[error.phase] += 1
+        counts["total"] = len(self.errors)
+        return counts
+
+    def root_display_name(self) -> str:
+        """Return the first line of tree_print (root name, plus the target if root_dir is a symlink)."""
         root_display_name = os.path.basename(self.root_dir)
         if os.path.islink(self.root_dir):
             try:
@@ -174,22 +468,276 @@ class DirectoryTree:
                 root_display_name += f" -> {target}"
             except OSError:
                  root_display_name += " -> [Broken Symlink]"
+        return root_display_name
 
-        final_tree_print = root_display_name + "\n" + "\n".join(self.tree_print_lines)
-        
-        return json.dumps({
+    def tree_print(self) -> str:
+        """Return the visual tree of the last scan, including the root line."""
+        final_tree_print = self.root_display_name() + "\n" + "\n".join(self.tree_print_lines)
+        return final_tree_print.rstrip()
+
+    def render_json(self, indent: Optional[int] = 4) -> str:
+        """Serialize the last scan as JSON without rescanning."""
+        document = {
             "root": os.path.basename(self.root_dir),
             "tree": self.tree,
-            "tree_print": final_tree_print.rstrip(),
+            "tree_print": self.tree_print(),
             "excluded_dirs": list(self.explicit_exclude_dir_names), # Sollte leer sein von 4gpt
             "excluded_files": list(self.general_exclude_patterns) # Enthält alle Muster
-        }, indent=4, ensure_ascii=False)
+        }
+        document["errors"] = [error._asdict() for error in self.errors]
+        document["error_counts"] = self.error_counts()
+        if self.detect_duplicates:
+            document["duplicates"] = [group._asdict() for group in self.duplicates]
+        return json.dumps(document, indent=indent, ensure_ascii=False)
+
+    def to_json(self) -> str:
+        self.scan()
+        return self.render_json()
+
+    def iter_entries(self) -> Iterator[TreeEntry]:
+        """
+        Yield the entries of the last scan in tree_print order (depth-first,
+        children sorted by name), with type, size and symlink target as they
+        were when the directories were scanned.
+
+        Raises:
+            ValueError: if the last scan was not done with scan(keep_entries=True)
+        """
+        if self.entries is None:
+            raise ValueError("The last scan did not keep its entries (use scan(keep_entries=True))")
+        return iter(self.entries)
+
+    def summary(self, top_n: int = 10, **walk_options: Any) -> Dict[str, Any]:
+        """
+        Walk root_dir and return size and structure statistics
+        (see dir_tree.analytics.SummarySink.summary). `walk_options` are passed on to walk().
+        """
+        from .analytics import SummarySink
+        sink = SummarySink()
+        self.walk([sink], **walk_options)
+        return sink.summary(top_n)
+
+    def write_snapshot(self, path: str) -> None:
+        """Write the last scan as a binary snapshot file (see dir_tree.snapshot)."""
+        from .snapshot import write_snapshot
+        write_snapshot(self, path)
+
+    @classmethod
+    def batch(cls, roots: Iterable[str],
+              exclude_dirs: Optional[Set[str]] = None,
+              exclude_files: Optional[Set[str]] = None,
+              max_workers: Optional[int] = None,
+              **options: Any) -> Iterator["DirectoryTree"]:
+        """
+        Scan many roots with one shared exclusion matcher and one worker pool
+        per device.
+
+        Roots that resolve to the same directory (same path, symlinked or
+        bind-mounted aliases with identical device and inode) are scanned only
+        once. Roots on different devices are scanned by separate pools, so a
+        slow device (e.g. a hanging NFS mount) cannot occupy the workers of
+        the others. Results are yielded as soon as each scan finishes, so the
+        order is the completion order, not the order of `roots`.
+
+        Args:
+            roots: Root directories to scan
+            exclude_dirs: Set of directory names to exclude (shared by all roots)
+            exclude_files: Set of fnmatch patterns to exclude (shared by all roots)
+            max_workers: Size of the worker pool of each device (default: ThreadPoolExecutor's default)
+            **options: Further DirectoryTree arguments (follow_symlinks_in_tree,
+                       show_file_sizes, max_depth, detect_duplicates, strict,
+                       one_file_system, exclude_mounts)
+
+        Yields:
+            One scanned DirectoryTree per root (duplicates get their own
+            instance with their own root_dir, sharing the scan result)
+        """
+        exclude_dirs = exclude_dirs if exclude_dirs is not None else set()
+        exclude_files = exclude_files if exclude_files is not None else set()
+        matcher = ExclusionMatcher(exclude_dirs, exclude_files)
+
+        aliases: Dict[Any, List[str]] = {} # Identität des Verzeichnisses -> alle Wurzeln dafür
+        for root in roots:
+            root = os.path.abspath(root)
+            try:
+                st = os.stat(root)
+                identity = (st.st_dev, st.st_ino)
+            except OSError:
+                identity = root # Scan liefert dann den üblichen Fehlereintrag
+            paths = aliases.setdefault(identity, [])
+            if root not in paths:
+                paths.append(root)
 
+        def _scan(root: str) -> "DirectoryTree":
+            tree = cls(root, exclude_dirs=exclude_dirs, exclude_files=exclude_files,
+                       matcher=matcher, **options)
+            tree.scan()
+            return tree
+
+        pools: Dict[Any, ThreadPoolExecutor] = {} # Gerät -> eigener Pool
+        try:
+            futures = {}
+            for identity, paths in aliases.items():
+                device = identity[0] if isinstance(identity, tuple) else None
+                if device not in pools:
+                    pools[device] = ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix=f"dir-tree-dev{device}")
+                futures[pools[device].submit(_scan, paths[0])] = paths
+            for future in as_completed(futures):
+                tree = future.result()
+                yield tree
+                for alias in futures[future][1:]:
+                    alias_tree = copy.copy(tree)
+                    alias_tree.root_dir = alias
+                    yield alias_tree
+        finally:
+            # Bei Fehler (strict) oder vorzeitig geschlossenem Generator: wartende Wurzeln nicht mehr scannen
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+
+def serve_main(argv: Optional[List[str]] = None): # CLI für `dir-tree serve`
+    from .server import serve, DEFAULT_CACHE_MB
+
+    parser = argparse.ArgumentParser(prog='dir-tree serve',
+                                     description='Serve directory trees from a warm cache over a Unix socket.')
+    parser.add_argument('--socket', type=str, required=True,
+                        help='Path of the Unix socket to listen on.')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB,
+                        help=f'Approximate memory budget of the scan cache in MB (default {DEFAULT_CACHE_MB}).')
+    args = parser.parse_args(argv)
+    try:
+        serve(args.socket, cache_mb=args.cache_mb)
+    except OSError as e: # Socket-Pfad belegt (andere Datei oder laufender Daemon)
+        print(f"Error: cannot listen on {args.socket}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def query_main(argv: Optional[List[str]] = None): # CLI für `dir-tree query`
+    from .query import TreeIndex, parse_size
+
+    parser = argparse.ArgumentParser(prog='dir-tree query',
+                                     description='Find entries in a directory tree or a saved snapshot.')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--dir', type=str, default=None,
+                        help='Directory to scan (default is current directory).')
+    source.add_argument('--snapshot', type=str, default=None,
+                        help='Query a snapshot written with --format snapshot instead of scanning.')
+    parser.add_argument('--load-prefs', action='store_true',
+                        help='Load saved exclusion preferences for the scan.')
+    parser.add_argument('--follow-symlinks-in-tree', action='store_true',
+                        help='Follow symbolic links to directories while scanning.')
+    parser.add_argument('--glob', type=str, default=None,
+                        help='Match names (or relative paths if the pattern contains "/"; "**" crosses directories).')
+    parser.add_argument('--min-size', type=parse_size, default=None,
+                        help='Minimum size, e.g. 10MB (directories: total size of their files).')
+    parser.add_argument('--max-size', type=parse_size, default=None,
+                        help='Maximum size, e.g. 1.5GB.')
+    parser.add_argument('--type', type=str, choices=[KIND_FILE, KIND_DIR, KIND_DIR_SYMLINK], default=None,
+                        help='Only entries of this type.')
+    parser.add_argument('--largest', type=int, metavar='N', default=None,
+                        help='Show the N largest entries (of --type, default file) instead of filtering.')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Show at most this many results.')
+    parser.add_argument('--format', type=str, choices=['text', 'json'], default='text',
+                        help='One result per line (default) or a JSON list.')
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        from .snapshot import Snapshot
+        with Snapshot(args.snapshot) as snap:
+            index = TreeIndex(snap.iter_entries())
+    else:
+        prefs = Preferences()
+        if args.load_prefs:
+            prefs.load_preferences()
+        tree = DirectoryTree(
+            root_dir=args.dir or os.getcwd(),
+            exclude_dirs=prefs.prefs.get("EXCLUDE_DIRS", set()),
+            exclude_files=prefs.prefs.get("EXCLUDE_FILES", set()),
+            follow_symlinks_in_tree=args.follow_symlinks_in_tree
+        )
+        tree.scan(keep_entries=True)
+        index = TreeIndex(tree.iter_entries())
+
+    if args.largest is not None:
+        results = index.largest(args.largest, type=args.type or KIND_FILE)
+    else:
+        results = index.find(glob=args.glob, min_size=args.min_size, max_size=args.max_size,
+                             type=args.type, limit=args.limit)
+
+    if args.format == 'json':
+        print(json.dumps([entry._asdict() for entry in results], indent=4, ensure_ascii=False))
+    else:
+        for entry in results:
+            suffix = '/' if entry.kind == KIND_DIR else ''
+            size = f"  ({DirectoryTree._format_size(entry.size)})" if entry.size is not None else ''
+            print(f"{entry.path}{suffix}{size}")
+    return 0
+
+
+def diff_main(argv: Optional[List[str]] = None): # CLI für `dir-tree diff`
+    from .diff import diff_trees
+    from .snapshot import Snapshot
+
+    parser = argparse.ArgumentParser(prog='dir-tree diff',
+                                     description='Show what changed between two scans. Each side is a snapshot '
+                                                 'file (written with --format snapshot) or a directory to scan now. '
+                                                 'Exits with 1 if there are changes, like diff.')
+    parser.add_argument('old', help='Earlier snapshot file or directory.')
+    parser.add_argument('new', help='Later snapshot file or directory.')
+    parser.add_argument('--load-prefs', action='store_true',
+                        help='Load saved exclusion preferences for sides that are scanned.')
+    parser.add_argument('--follow-symlinks-in-tree', action='store_true',
+                        help='Follow symbolic links to directories for sides that are scanned.')
+    parser.add_argument('--format', type=str, choices=['text', 'json'], default='text',
+                        help='Changed branches as a tree (default) or the change list as JSON.')
+    args = parser.parse_args(argv)
+
+    prefs = Preferences()
+    if args.load_prefs:
+        prefs.load_preferences()
+
+    def open_side(path: str) -> Any:
+        if os.path.isdir(path):
+            tree = DirectoryTree(
+                root_dir=path,
+                exclude_dirs=prefs.prefs.get("EXCLUDE_DIRS", set()),
+                exclude_files=prefs.prefs.get("EXCLUDE_FILES", set()),
+                follow_symlinks_in_tree=args.follow_symlinks_in_tree
+            )
+            tree.scan(keep_entries=True)
+            return tree
+        return Snapshot(path)
+
+    old, new = open_side(args.old), open_side(args.new)
+    try:
+        result = diff_trees(old, new)
+        print(result.to_json() if args.format == 'json' else result.tree_print())
+    finally:
+        for side in (old, new):
+            if isinstance(side, Snapshot):
+                side.close()
+    return 1 if result else 0
+
+
+def main(argv: Optional[List[str]] = None): # CLI für dir-tree standalone
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'serve':
+        return serve_main(argv[1:])
+    if argv and argv[0] == 'query':
+        return query_main(argv[1:])
+    if argv and argv[0] == 'diff':
+        return diff_main(argv[1:])
 
-def main(): # CLI für dir-tree standalone
     parser = argparse.ArgumentParser(description='Generate a directory tree structure as JSON.')
-    parser.add_argument('--dir', type=str, default=os.getcwd(),
-                        help='The directory to start from (default is current directory).')
+    parser.add_argument('--dir', type=str, action='append', default=None,
+                        help='The directory to start from (default is current directory). '
+                             'Repeat to scan several roots in one batch.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of roots scanned in parallel per device when several --dir are given.')
     parser.add_argument('--exclude-dir', type=str, nargs='*', default=[],
                         help='Directories to exclude by exact name.')
     parser.add_argument('--exclude-file', type=str, nargs='*', default=[],
@@ -202,8 +750,63 @@ def main(): # CLI für dir-tree standalone
                         help='Follow symbolic links to directories when generating the tree structure view.')
     parser.add_argument('--show-file-sizes', action='store_true',
                         help='Display human-readable file sizes next to file names in the tree output.')
+    error_policy = parser.add_mutually_exclusive_group()
+    error_policy.add_argument('--strict', action='store_true', default=False,
+                              help='Abort on the first error while listing directories or reading sizes.')
+    error_policy.add_argument('--lenient', action='store_false', dest='strict',
+                              help='Record errors and keep scanning (default); they are listed under '
+                                   '"errors" in the JSON output and counted on stderr.')
+    parser.add_argument('--one-file-system', action='store_true',
+                        help='Do not descend into directories on other filesystems (mount points are listed).')
+    parser.add_argument('--exclude-mount', type=str, nargs='*', default=[],
+                        help='Leave out these mount points, or all mount points of these filesystem types '
+                             '(e.g. proc nfs4).')
+    parser.add_argument('--max-depth', type=int, default=None,
+                        help='Do not descend into directories deeper than this many levels.')
+    parser.add_argument('--format', type=str, choices=['text', 'json', 'snapshot'] + sorted(RENDERERS),
+                        default='text',
+                        help='Output the tree_print text (default), the full JSON document, a binary snapshot '
+                             '(see dir_tree.snapshot) or one of the streaming renderers (see dir_tree.renderers).')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the output to this file instead of stdout.')
+    parser.add_argument('--compress', type=str, choices=COMPRESSIONS, default=None,
+                        help='Compress --output of the streaming formats (default: by .gz/.zst suffix).')
+    parser.add_argument('--duplicates', action='store_true',
+                        help='Find files with identical content; they are marked [duplicate #N] in the tree '
+                             'and listed under "duplicates" in the JSON output.')
+    parser.add_argument('--summary', action='store_true',
+                        help='Print only size percentiles, a size histogram, the largest files and '
+                             'per-extension and per-depth counts (as JSON with --format json).')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Number of largest files listed by --summary (default: 10).')
+    parser.add_argument('--checkpoint', type=str, metavar='PATH', default=None,
+                        help='Save the scan progress to PATH periodically and on Ctrl+C/SIGTERM, '
+                             'so an interrupted scan can be continued with --resume PATH.')
+    parser.add_argument('--checkpoint-interval', type=float, metavar='SECONDS', default=DEFAULT_INTERVAL,
+                        help=f'Seconds between two checkpoints (default: {DEFAULT_INTERVAL:g}).')
+    parser.add_argument('--resume', type=str, metavar='PATH', default=None,
+                        help='Continue the scan saved in checkpoint PATH (same --dir and exclusions); '
+                             'the output is the same as that of an uninterrupted run.')
+    parser.add_argument('--progress', action='store_true',
+                        help='Report entries/s, pending directories, bytes sized and the current path on stderr '
+                             'while scanning.')
+    parser.add_argument('--client', type=str, metavar='SOCKET', default=None,
+                        help='Ask a running `dir-tree serve` daemon listening on SOCKET instead of scanning locally.')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    roots = args.dir or [os.getcwd()]
+    if args.format not in ('text', 'json') and (len(roots) > 1 or args.client):
+        parser.error(f'--format {args.format} needs a single --dir and cannot be used with --client')
+    if (args.checkpoint or args.resume) and (len(roots) > 1 or args.client or (args.checkpoint and args.resume)):
+        parser.error('--checkpoint/--resume need a single --dir, cannot be combined with each other or with --client')
+    if args.strict and args.client:
+        parser.error('--strict cannot be used with --client')
+    if args.progress and (len(roots) > 1 or args.client):
+        parser.error('--progress needs a single --dir and cannot be used with --client')
+    if args.duplicates and (args.format not in ('text', 'json') or args.summary or args.client):
+        parser.error('--duplicates needs --format text or json and cannot be used with --summary or --client')
+    if args.summary and (args.format not in ('text', 'json') or len(roots) > 1 or args.client):
+        parser.error('--summary needs a single --dir, --format text or json and cannot be used with --client')
     prefs = Preferences()
 
     if args.load_prefs:
@@ -218,21 +821,155 @@ def main(): # CLI für dir-tree standalone
     if args.save_prefs:
         prefs.save_preferences()
 
+    if args.client:
+        from .server import send_request
+        for i, root in enumerate(roots):
+            try:
+                response = send_request(args.client, {
+                    "root": os.path.abspath(root),
+                    "exclude_dirs": sorted(prefs.prefs.get("EXCLUDE_DIRS", set())),
+                    "exclude_files": sorted(prefs.prefs.get("EXCLUDE_FILES", set())),
+                    "follow_symlinks_in_tree": args.follow_symlinks_in_tree,
+                    "show_file_sizes": args.show_file_sizes,
+                    "max_depth": args.max_depth,
+                    "one_file_system": args.one_file_system,
+                    "exclude_mounts": sorted(args.exclude_mount),
+                    "format": args.format,
+                })
+            except OSError as e:
+                print(f"Error: cannot reach dir-tree daemon at {args.client}: {e}", file=sys.stderr)
+                return 1
+            if not response.get("ok"):
+                print(f"Error: {response.get('error')}", file=sys.stderr)
+                return 1
+            if i:
+                print()
+            print(response["result"])
+        return 0
+
     # Für die dir-tree CLI:
     # exclude_dirs kommt aus prefs["EXCLUDE_DIRS"]
     # exclude_files kommt aus prefs["EXCLUDE_FILES"]
-    tree_generator = DirectoryTree(
-        root_dir=args.dir,
+    tree_options = dict(
         exclude_dirs=prefs.prefs.get("EXCLUDE_DIRS", set()), # Explizite Verzeichnisnamen
         exclude_files=prefs.prefs.get("EXCLUDE_FILES", set()), # Muster für Dateien und Verzeichnisse
         follow_symlinks_in_tree=args.follow_symlinks_in_tree,
-        show_file_sizes=args.show_file_sizes
+        show_file_sizes=args.show_file_sizes,
+        max_depth=args.max_depth,
+        detect_duplicates=args.duplicates,
+        strict=args.strict,
+        one_file_system=args.one_file_system,
+        exclude_mounts=set(args.exclude_mount)
     )
 
-    tree_json_str = tree_generator.to_json()
-    tree_data = json.loads(tree_json_str)
-    print(tree_data['tree_print'])
+    if len(roots) > 1:
+        # Mehrere Wurzeln: Ergebnisse erscheinen in Abschlussreihenfolge.
+        # Im JSON-Format eine kompakte Zeile pro Wurzel (JSON Lines).
+        out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            for i, tree_generator in enumerate(DirectoryTree.batch(roots, max_workers=args.workers, **tree_options)):
+                _report_errors(tree_generator)
+                if args.format == 'json':
+                    print(tree_generator.render_json(indent=None), file=out, flush=True)
+                else:
+                    if i:
+                        print(file=out)
+                    print(f"==> {tree_generator.root_dir} <==", file=out)
+                    print(tree_generator.tree_print(), file=out, flush=True)
+        except OSError as e:
+            if not args.strict:
+                raise
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 0
+
+    tree_generator = DirectoryTree(root_dir=roots[0], **tree_options)
+
+    walk_options: Dict[str, Any] = {}
+    if args.checkpoint or args.resume:
+        cancel = CancelToken()
+        cancel.install_signal_handlers() # Ctrl+C/SIGTERM sichern den Checkpoint statt abzubrechen
+        walk_options = dict(cancel=cancel, checkpoint=Checkpointer(args.resume or args.checkpoint,
+                                                                   args.checkpoint_interval,
+                                                                   resume=bool(args.resume)))
+    try:
+        if args.progress:
+            with ProgressPrinter() as printer:
+                result = _scan_single(args, parser, tree_generator, dict(walk_options, progress=printer))
+        else:
+            result = _scan_single(args, parser, tree_generator, walk_options)
+        _report_errors(tree_generator)
+        return result
+    except OSError as e:
+        if not args.strict:
+            raise
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except ScanCancelled as e:
+        print(f"{e}", file=sys.stderr)
+        return 130
+    except CheckpointError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if 'cancel' in walk_options:
+            walk_options['cancel'].restore_signal_handlers()
+
+
+def _report_errors(tree: DirectoryTree) -> None:
+    counts = tree.error_counts()
+    if counts.pop("total"):
+        details = ", ".join(f"{phase}: {count}" for phase, count in counts.items() if count)
+        print(f"dir-tree: {len(tree.errors)} errors while scanning {tree.root_dir} ({details})", file=sys.stderr)
+
+
+def _scan_single(args: argparse.Namespace, parser: argparse.ArgumentParser,
+                 tree_generator: DirectoryTree, walk_options: Dict[str, Any]) -> int:
+    if args.format == 'snapshot':
+        from .snapshot import SnapshotSink
+        tree_generator.walk([SnapshotSink(args.output if args.output else sys.stdout.buffer)], **walk_options)
+        return 0
+
+    if args.format in RENDERERS:
+        # Streamende Ausgabe: kein Baum-Dict, keine tree_print-Zeilen im Speicher
+        if args.output:
+            try:
+                out = open_output(args.output, args.compress)
+            except ValueError as e:
+                parser.error(str(e))
+        else:
+            out = sys.stdout
+        options = {'show_file_sizes': args.show_file_sizes} if args.format in ('markdown', 'html') else {}
+        try:
+            tree_generator.walk([RENDERERS[args.format](out, **options)], **walk_options)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 0
+
+    if args.summary:
+        from .analytics import format_summary
+        summary = tree_generator.summary(args.top, **walk_options)
+        output = json.dumps(summary, indent=4, ensure_ascii=False) if args.format == 'json' else format_summary(summary)
+    elif args.format == 'json':
+        tree_generator.scan(**walk_options)
+        output = tree_generator.render_json()
+    else:
+        # Nur tree_print: das Baum-Dict wird nicht aufgebaut
+        tree_generator.scan(build_dict=False, **walk_options)
+        output = tree_generator.tree_print()
+    if 'cancel' in walk_options:
+        walk_options['cancel'].restore_signal_handlers() # Scan fertig: Ctrl+C bricht das Schreiben wieder ab
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,172 @@
+# dir_tree/duplicates.py
+
+"""
+Duplicate file detection with staged hashing.
+
+Hashing every file of a large tree is expensive, so candidates are narrowed
+down in three stages and each stage only looks at what the previous one left:
+
+    1. group files by size (known from the traversal, no I/O)
+    2. hash the first HEAD_SIZE bytes of files that share a size
+    3. hash the full content of files that share size and head hash
+
+Stages 2 and 3 run on a thread pool; hashlib releases the GIL while hashing,
+so reads and hashing of different files overlap. Large files are hashed from
+an mmap in a single update() call, smaller ones through a reused 1 MB buffer.
+Hard links to the same inode are hashed once and do not count as wasted space.
+
+Example:
+    >>> tree = DirectoryTree(".", detect_duplicates=True); tree.scan()
+    >>> for group in tree.duplicates:
+    ...     print(group.wasted, group.paths)
+"""
+
+import os
+import mmap
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .entries import ScanEntry, KIND_FILE
+from .renderers import TreeSink
+
+HEAD_SIZE = 4096
+CHUNK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_ALGORITHM = "sha256" # Mit SHA-Erweiterungen schneller als blake2b (siehe benchmark_hashing.py)
+
+
+class DuplicateGroup(NamedTuple):
+    size: int          # Size of each file in bytes
+    digest: str        # Hex digest of the content
+    paths: List[str]   # Relative paths, sorted
+    wasted: int        # Bytes that could be reclaimed (hard links to one inode count once)
+
+
+def hash_file(path: str, algorithm: str = DEFAULT_ALGORITHM, limit: Optional[int] = None) -> str:
+    """
+    Return the hex digest of a file's content.
+
+    Args:
+        path: File to hash
+        algorithm: Any hashlib algorithm name
+        limit: Hash only the first `limit` bytes (None = whole file)
+
+    Raises:
+        OSError: if the file cannot be read
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, "rb", buffering=0) as f:
+        if limit is not None:
+            digest.update(f.read(limit))
+            return digest.hexdigest()
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+                return digest.hexdigest()
+            except (OSError, ValueError): # z.B. Dateisysteme ohne mmap-Unterstützung
+                f.seek(0)
+        buffer = bytearray(CHUNK_SIZE)
+        view = memoryview(buffer)
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def find_duplicates(files: Iterable[Tuple[str, str, int]],
+                    max_workers: Optional[int] = None,
+                    head_size: int = HEAD_SIZE,
+                    algorithm: str = DEFAULT_ALGORITHM) -> List[DuplicateGroup]:
+    """
+    Find files with identical content.
+
+    Args:
+        files: (relative path, absolute path, size) per file; symlinks should
+               be left out, they would duplicate their targets
+        max_workers: Size of the hashing thread pool (default: ThreadPoolExecutor's default)
+        head_size: Number of leading bytes hashed in the second stage
+        algorithm: hashlib algorithm used for both hash stages
+
+    Returns:
+        Groups of two or more identical non-empty files, most wasted bytes
+        first. Files that cannot be read are skipped.
+    """
+    by_size: Dict[int, List[Tuple[str, str, int]]] = {}
+    for item in files:
+        if item[2] > 0: # Leere Dateien sind trivial gleich
+            by_size.setdefault(item[2], []).append(item)
+    candidates = [item for group in by_size.values() if len(group) > 1 for item in group]
+    if not candidates:
+        return []
+
+    def head(item: Tuple[str, str, int]) -> Optional[Tuple[Any, str]]:
+        try:
+            st = os.stat(item[1])
+            return (st.st_dev, st.st_ino), hash_file(item[1], algorithm, head_size)
+        except OSError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # (Größe, Kopf-Hash) -> Inode-Identität -> Pfade
+        by_head: Dict[Tuple[int, str], Dict[Any, List[Tuple[str, str, int]]]] = {}
+        for item, result in zip(candidates, pool.map(head, candidates)):
+            if result is not None:
+                identity, digest = result
+                by_head.setdefault((item[2], digest), {}).setdefault(identity, []).append(item)
+
+        # Nur Gruppen mit mehreren Inodes weiter prüfen; Dateien bis head_size sind bereits vollständig gehasht
+        by_content: Dict[Tuple[int, str], List[List[Tuple[str, str, int]]]] = {}
+        to_hash: List[Tuple[int, List[Tuple[str, str, int]]]] = []
+        for (size, digest), identities in by_head.items():
+            if len(identities) < 2:
+                continue
+            if size <= head_size:
+                by_content[(size, digest)] = list(identities.values())
+            else:
+                to_hash.extend((size, links) for links in identities.values())
+
+        def full(links: List[Tuple[str, str, int]]) -> Optional[str]:
+            try:
+                return hash_file(links[0][1], algorithm)
+            except OSError:
+                return None
+
+        for (size, links), digest in zip(to_hash, pool.map(full, [links for _, links in to_hash])):
+            if digest is not None:
+                by_content.setdefault((size, digest), []).append(links)
+
+    groups = [
+        DuplicateGroup(size, digest, sorted(item[0] for links in identities for item in links),
+                       size * (len(identities) - 1))
+        for (size, digest), identities in by_content.items() if len(identities) > 1
+    ]
+    groups.sort(key=lambda group: (-group.wasted, group.paths[0]))
+    return groups
+
+
+class DuplicateSink(TreeSink):
+    """
+    Collects regular files during a traversal for find_duplicates().
+
+    Also records each file's position in the visit order, which is its line
+    index in TreePrintSink.lines of the same walk.
+    """
+    needs_size = True
+
+    def __init__(self):
+        self.files: List[Tuple[str, str, int]] = []
+        self.ordinals: Dict[str, int] = {}
+        self._visited = 0
+
+    def visit(self, entry: ScanEntry) -> None:
+        if entry.kind == KIND_FILE and entry.target is None and entry.size:
+            self.files.append((entry.path, entry.abs_path, entry.size))
+            self.ordinals[entry.path] = self._visited
+        self._visited += 1
+
+    def groups(self, max_workers: Optional[int] = None) -> List[DuplicateGroup]:
+        return find_duplicates(self.files, max_workers)
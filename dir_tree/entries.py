@@ -0,0 +1,111 @@
+# dir_tree/entries.py
+
+import os
+import errno as errno_module
+from typing import NamedTuple, Optional
+
+# Eintragsarten, wie sie iter_entries(), die Renderer und die Snapshot-Dateien verwenden
+KIND_DIR = "dir"
+KIND_FILE = "file"
+KIND_DIR_SYMLINK = "dir_symlink_no_follow" # Gleicher Wert wie "_type" im JSON-Baum
+KIND_MARKER = "marker" # Platzhalter wie "[Permission Denied]"
+
+MARKER_PERMISSION_DENIED = "[Permission Denied]"
+MARKER_NOT_FOUND = "[Directory Not Found or Broken Symlink Target]"
+MARKER_ERROR = "[Error Reading Directory]" # Andere OSError beim Listen (ELOOP, ESTALE, ...)
+MARKER_NAMES = (MARKER_PERMISSION_DENIED, MARKER_NOT_FOUND, MARKER_ERROR)
+
+# Phasen, in denen ein ScanError auftreten kann
+PHASE_LIST = "list"   # os.scandir() eines Verzeichnisses
+PHASE_STAT = "stat"   # lstat() eines Eintrags (needs_stat)
+PHASE_SIZE = "size"   # stat() für die Dateigröße (needs_size)
+PHASE_TYPE = "type"   # is_dir()/is_symlink(), falls der Typ nicht aus scandir bekannt ist
+
+
+class TreeEntry(NamedTuple):
+    """One entry of a scanned tree (the root itself is never an entry)."""
+    path: str             # Relative path from the root, '/'-separated
+    name: str
+    depth: int            # 1 for direct children of the root
+    kind: str             # One of the KIND_* constants
+    size: Optional[int]   # File size in bytes (follows symlinks); None if unknown or not a file
+    target: Optional[str] # Symlink target as shown in tree_print, None if not a symlink
+
+
+class ScanError(NamedTuple):
+    """An OSError recorded during a scan instead of aborting it."""
+    path: str             # Absolute path of the entry or directory
+    phase: str            # One of the PHASE_* constants
+    errno: Optional[int]
+    error: str            # Symbolic errno name (e.g. "EACCES"), or the exception type
+    message: str
+
+    @classmethod
+    def from_exception(cls, path: str, phase: str, exc: OSError) -> "ScanError":
+        name = errno_module.errorcode.get(exc.errno, type(exc).__name__) if exc.errno else type(exc).__name__
+        return cls(path, phase, exc.errno, name, exc.strerror or str(exc))
+
+
+class ScanEntry:
+    """
+    An entry as seen by renderers during a traversal (see DirectoryTree.walk).
+
+    Has the same fields as TreeEntry plus traversal details. `size` and `stat`
+    are only filled in if one of the renderers asked for them
+    (TreeSink.needs_size / TreeSink.needs_stat).
+    """
+    __slots__ = ("path", "name", "depth", "kind", "size", "target",
+                 "abs_path", "is_last", "descend", "stat", "mount_boundary")
+
+    def __init__(self, path: str, name: str, depth: int, kind: str,
+                 size: Optional[int], target: Optional[str],
+                 abs_path: str, is_last: bool, descend: bool,
+                 stat: Optional[os.stat_result] = None, mount_boundary: bool = False):
+        self.path = path
+        self.name = name
+        self.depth = depth
+        self.kind = kind
+        self.size = size
+        self.target = target
+        self.abs_path = abs_path   # Absolute path on disk
+        self.is_last = is_last     # Last entry of its directory
+        self.descend = descend     # Children follow (False for depth-limited directories)
+        self.stat = stat           # lstat() of the entry itself (symlinks are not followed)
+        self.mount_boundary = mount_boundary # Directory on another device, not descended (one_file_system)
+
+    def to_tree_entry(self) -> TreeEntry:
+        return TreeEntry(self.path, self.name, self.depth, self.kind, self.size, self.target)
+
+    def __repr__(self) -> str:
+        return f"ScanEntry({self.path!r}, kind={self.kind!r}, size={self.size!r})"
+
+
+def describe_symlink(item_path: str) -> str:
+    """Return the symlink target as shown in the tree (relative to the link's directory if possible)."""
+    try:
+        target_path = os.readlink(item_path)
+        # Versuche, den Zielpfad relativ zum Symlink-Verzeichnis darzustellen
+        try:
+            # realpath löst alle Symlinks im Pfad auf, um den kanonischen Pfad zu erhalten
+            resolved_target_path = os.path.realpath(item_path)
+            # relpath vom Verzeichnis des Symlinks zum aufgelösten Ziel
+            return os.path.relpath(resolved_target_path, os.path.dirname(item_path))
+        except ValueError: # z.B. Pfade auf unterschiedlichen Laufwerken (Windows)
+            return str(target_path)
+    except OSError: # Fehler beim Lesen des Symlink-Ziels (z.B. broken symlink)
+        return "[Broken Symlink]"
+
+
+def file_extension(name: str) -> str:
+    """Return the lower-cased suffix from the last dot, e.g. ".gz" (empty for "Makefile" and ".bashrc")."""
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot > 0 else ""
+
+
+def format_size(size_bytes: float) -> str:
+    """Convert bytes to human-readable format, e.g. "1.5 KB" (see DirectoryTree._format_size)."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024.0:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024.0
+    return f"{size_bytes:.1f} TB"
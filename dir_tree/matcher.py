@@ -0,0 +1,40 @@
+# dir_tree/matcher.py
+
+import os
+import re
+import fnmatch
+from typing import Callable, Iterable, Optional
+
+
+class ExclusionMatcher:
+    """
+    Compiled form of the exclusion settings of a DirectoryTree.
+
+    All fnmatch patterns are translated once into a single regular expression,
+    so checking a name costs one regex match instead of one fnmatch call per
+    pattern. A matcher is immutable and can be shared between trees and threads
+    (see DirectoryTree.batch).
+    """
+
+    def __init__(self, exclude_dirs: Optional[Iterable[str]] = None,
+                 exclude_patterns: Optional[Iterable[str]] = None):
+        """
+        Args:
+            exclude_dirs: Directory names to exclude (exact match, directories only)
+            exclude_patterns: fnmatch patterns matched against file and directory names
+        """
+        self.exclude_dirs = frozenset(exclude_dirs or ())
+        self.exclude_patterns = frozenset(exclude_patterns or ())
+        self._match_pattern: Optional[Callable] = None
+        if self.exclude_patterns:
+            # fnmatch.fnmatch normalisiert Groß-/Kleinschreibung je nach Plattform, daher hier ebenso
+            regex = "|".join(fnmatch.translate(os.path.normcase(p)) for p in sorted(self.exclude_patterns))
+            self._match_pattern = re.compile(regex).match
+
+    def is_excluded(self, item_name: str, item_path: str) -> bool:
+        # Namensvergleich zuerst: os.path.isdir kostet einen stat-Aufruf
+        if item_name in self.exclude_dirs and os.path.isdir(item_path):
+            return True
+        if self._match_pattern is not None and self._match_pattern(os.path.normcase(item_name)):
+            return True
+        return False
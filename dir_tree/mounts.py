@@ -0,0 +1,92 @@
+# dir_tree/mounts.py
+
+"""
+Mount table lookup for mount-boundary controls.
+
+`read_mounts()` returns the mount points of the running system with their
+filesystem types (from /proc/self/mountinfo on Linux, `mount` output as a
+fallback elsewhere). `excluded_mount_points()` turns a user's exclusion list,
+which may mix mount points and filesystem types (e.g. "/mnt/backup", "nfs4",
+"proc"), into the set of mount point paths the traversal must not enter, and
+`mount_point_ids()` maps those paths to (st_dev, st_ino) so that a mount
+point is recognized however it is reached (symlinked root, followed symlinks).
+"""
+
+import os
+import re
+import subprocess
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+_MOUNTINFO = "/proc/self/mountinfo"
+_MOUNT_LINE = re.compile(r"^.+ on (?P<mount>.+) (?:type (?P<linux>\S+)|\((?P<bsd>[^,)]+))")
+
+
+def _unescape(path: str) -> str:
+    # mountinfo kodiert Leerzeichen, Tabs, Zeilenumbrüche und Backslashes oktal (\040 usw.)
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), path)
+
+
+def read_mounts() -> Dict[str, str]:
+    """
+    Return {mount point: filesystem type} for all mounts visible to this process.
+
+    Returns an empty dict if the mount table cannot be read.
+    """
+    mounts: Dict[str, str] = {}
+    try:
+        with open(_MOUNTINFO, encoding="utf-8", errors="surrogateescape") as f:
+            for line in f:
+                fields = line.split()
+                # Felder: ID, Eltern-ID, major:minor, Wurzel, Mountpunkt, Optionen, [optionale Felder], -, Typ, ...
+                separator = fields.index("-")
+                mounts[_unescape(fields[4])] = fields[separator + 1]
+        return mounts
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        output = subprocess.run(["mount"], capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return mounts
+    for line in output.splitlines():
+        match = _MOUNT_LINE.match(line)
+        if match:
+            mounts[match.group("mount")] = match.group("linux") or match.group("bsd")
+    return mounts
+
+
+def excluded_mount_points(exclusions: Iterable[str], mounts: Optional[Dict[str, str]] = None) -> Set[str]:
+    """
+    Resolve mount exclusions to absolute mount point paths.
+
+    Args:
+        exclusions: Mount point paths and/or filesystem type names
+        mounts: Mount table as returned by read_mounts() (read if None)
+
+    Entries containing a path separator are taken as mount points (made
+    absolute), all others as filesystem types matched against the mount table.
+    """
+    exclusions = list(exclusions)
+    paths = {os.path.abspath(e) for e in exclusions if os.sep in e}
+    fstypes = {e for e in exclusions if os.sep not in e}
+    if fstypes:
+        if mounts is None:
+            mounts = read_mounts()
+        paths.update(mount for mount, fstype in mounts.items() if fstype in fstypes)
+    return paths
+
+
+def mount_point_ids(paths: Iterable[str]) -> Set[Tuple[int, int]]:
+    """
+    Return the (st_dev, st_ino) of each mount point, following symlinks.
+
+    Paths that cannot be stat'ed (e.g. an excluded mount point that is not
+    mounted on this system) are skipped.
+    """
+    ids = set()
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        ids.add((st.st_dev, st.st_ino))
+    return ids
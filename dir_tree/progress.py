@@ -0,0 +1,185 @@
+# dir_tree/progress.py
+
+"""
+Progress reporting for long scans.
+
+DirectoryTree.walk(progress=callback) calls `callback` with a ScanProgress at
+most every `progress_interval` seconds, plus once when the walk is done. The
+clock is checked before every directory listing and every `tick_entries`
+entries. The counters are kept by a sink that only increments integers;
+everything else is computed when a report is due, so reporting costs next to
+nothing. If the callback has a `listing(path)` method, it is called with each
+directory about to be listed.
+
+`ProgressPrinter` renders the reports on stderr. While the traversal is stuck
+(e.g. in a directory listing on a hanging NFS mount) no reports arrive, so it
+also repeats the last one with the time since the last update and the
+directory whose listing has not returned.
+
+Example:
+    >>> with ProgressPrinter() as printer:
+    ...     DirectoryTree("/srv").scan(progress=printer)
+"""
+
+import sys
+import time
+import threading
+from typing import Any, List, NamedTuple, Optional, TextIO
+
+from .entries import ScanEntry, KIND_DIR, format_size
+from .renderers import TreeSink
+
+DEFAULT_PROGRESS_INTERVAL = 0.5
+
+
+class ScanProgress(NamedTuple):
+    entries: int          # Entries visited so far
+    dirs_listed: int      # Directories listed so far
+    dirs_pending: int     # Directories listed in a parent but not visited yet
+    bytes_sized: int      # Total of the file sizes looked up so far
+    current_path: str     # Directory being listed (or listed last)
+    elapsed: float        # Seconds since the walk started
+    rate: float           # Entries per second since the previous report (whole walk if done)
+    done: bool            # True for the final report
+
+
+class _ProgressSink(TreeSink):
+    """Counts visited entries and known file sizes (does not request sizes itself)."""
+
+    def __init__(self):
+        self.entries = 0
+        self.bytes_sized = 0
+
+    def visit(self, entry: ScanEntry) -> None:
+        self.entries += 1
+        if entry.size:
+            self.bytes_sized += entry.size
+
+
+class ProgressTracker:
+    """Turns the traversal stack and the counters into rate-limited ScanProgress reports."""
+
+    def __init__(self, callback: Any, interval: float = DEFAULT_PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.sink = _ProgressSink()
+        self.current_path: Optional[str] = None
+        self._on_listing = getattr(callback, "listing", None)
+        self._start = self._last = time.monotonic()
+        self._last_entries = 0
+
+    def _report(self, tree: Any, stack: List[list], now: float, done: bool) -> None:
+        pending = 0
+        for frame in stack:
+            for item in frame[4][frame[5]:]:
+                if item.kind == KIND_DIR:
+                    pending += 1
+        entries = self.sink.entries
+        if done: # Abschlussbericht: Durchschnitt über den ganzen Lauf
+            rate = entries / (now - self._start) if now > self._start else 0.0
+        else:
+            rate = (entries - self._last_entries) / (now - self._last) if now > self._last else 0.0
+        self._last, self._last_entries = now, entries
+        if done or self.current_path is None: # Fortgesetzter Scan vor dem ersten Listing
+            current_path = stack[-1][1] if stack else tree.root_dir
+        else:
+            current_path = self.current_path
+        self.callback(ScanProgress(entries, len(tree.scanned_dirs), pending, self.sink.bytes_sized,
+                                   current_path, now - self._start, rate, done))
+
+    def listing(self, tree: Any, path: str, stack: List[list]) -> None:
+        """Called before a directory is listed: remember it and report if due."""
+        self.current_path = path
+        if self._on_listing is not None:
+            self._on_listing(path)
+        self.tick(tree, stack)
+
+    def tick(self, tree: Any, stack: List[list]) -> None:
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._report(tree, stack, now, False)
+
+    def finish(self, tree: Any) -> None:
+        self._report(tree, [], time.monotonic(), True)
+
+
+class ProgressPrinter:
+    """
+    Progress callback that renders reports on a stream (stderr by default).
+
+    On a terminal the report is redrawn in place; otherwise one line is
+    written per report. Use it as a context manager to repeat the last
+    report while no new one arrives (stalled traversal).
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, stall_after: float = 5.0):
+        self.stream = stream if stream is not None else sys.stderr
+        self.stall_after = stall_after
+        self.interactive = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self._last: Optional[ScanProgress] = None
+        self._last_time = time.monotonic()
+        self._listing_path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def format(progress: ScanProgress, stalled: float = 0.0) -> str:
+        text = (f"{progress.entries:,} entries ({progress.rate:,.0f}/s), "
+                f"{progress.dirs_pending:,} dirs pending, {format_size(progress.bytes_sized)} sized, "
+                f"{progress.elapsed:.0f}s")
+        if progress.done:
+            return f"Done: {text}"
+        if stalled:
+            text += f", no update for {stalled:.0f}s"
+        return f"{text}: {progress.current_path}"
+
+    def _write(self, line: str, final: bool = False) -> None:
+        if self.interactive:
+            self.stream.write("\r\033[K" + line + ("\n" if final else ""))
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def __call__(self, progress: ScanProgress) -> None:
+        with self._lock:
+            self._last = progress
+            self._last_time = time.monotonic()
+            self._write(self.format(progress), progress.done)
+
+    def listing(self, path: str) -> None:
+        """Called by the traversal with each directory about to be listed."""
+        self._listing_path = path
+
+    def stall_line(self, stalled: float) -> Optional[str]:
+        """The line repeated after `stalled` seconds without a report (None once done)."""
+        last = self._last
+        if last is None: # Schon das erste Listing hängt
+            last = ScanProgress(0, 0, 0, 0, "", stalled, 0.0, False)
+        elif last.done:
+            return None
+        if self._listing_path is not None:
+            last = last._replace(current_path=self._listing_path)
+        return self.format(last, stalled)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.stall_after):
+            with self._lock:
+                stalled = time.monotonic() - self._last_time
+                line = self.stall_line(stalled) if stalled >= self.stall_after else None
+                if line is not None:
+                    self._write(line)
+
+    def __enter__(self) -> "ProgressPrinter":
+        self._last_time = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="dir-tree-progress", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.interactive and self._last is not None and not self._last.done:
+            self.stream.write("\n")
@@ -0,0 +1,241 @@
+# dir_tree/query.py
+
+"""
+Indexed queries over a scanned tree.
+
+`TreeIndex` builds its indexes once (sorted paths, extensions, sizes per kind)
+from the entries of a DirectoryTree or a Snapshot and then answers queries such
+as "all *.so files over 10 MB", "everything under src/**/tests" or "the largest
+directories" without walking the whole tree again.
+
+Example:
+    >>> tree = DirectoryTree("."); tree.scan(keep_entries=True)
+    >>> index = TreeIndex(tree.iter_entries())
+    >>> index.find(glob="*.so", min_size=10 * 1024 * 1024, type="file")
+    >>> index.largest(10, type="dir")
+"""
+
+import re
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from .directory_tree import TreeEntry, KIND_DIR, KIND_FILE
+from .entries import file_extension
+
+_WILDCARDS = re.compile(r"[*?\[]")
+_SIMPLE_EXTENSION_GLOB = re.compile(r"^\*(\.[^*?\[\]/.]+)$") # Genau ein Punkt: "*.gz", nicht "*.tar.gz"
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024 ** 2, "MB": 1024 ** 2,
+               "G": 1024 ** 3, "GB": 1024 ** 3, "T": 1024 ** 4, "TB": 1024 ** 4}
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a size such as "512", "10MB", "1.5 GB" or "4k" into bytes (1 KB = 1024 B).
+
+    Raises:
+        ValueError: if the value is not a valid size
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", value)
+    if not match or match.group(2).upper() not in _SIZE_UNITS:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def glob_to_regex(glob: str) -> Pattern:
+    """
+    Translate a path glob into a compiled regex.
+
+    `*` and `?` do not cross '/', `**` matches any number of directories
+    (including none) and `[...]` is a character class, as in fnmatch.
+    """
+    parts = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif c == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif c == "?":
+            parts.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = glob.find("]", i + 2 if glob[i + 1:i + 2] in ("!", "]") else i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+                i += 1
+            else:
+                body = glob[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end + 1
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
+
+
+class TreeIndex:
+    """
+    Query indexes over the entries of a scanned tree.
+
+    Indexes built once in O(N log N):
+        - all entries sorted by path (prefix ranges via binary search)
+        - entry positions per extension (dotfiles such as ".bashrc" under
+          their whole name, so "*.bashrc" finds them)
+        - (size, position) pairs sorted by size, per kind
+    Directory sizes are the totals of all files below them.
+    """
+
+    def __init__(self, entries: Iterable[TreeEntry]):
+        """
+        Args:
+            entries: TreeEntry objects in depth-first order, as produced by
+                     DirectoryTree.iter_entries() or Snapshot.iter_entries()
+        """
+        entries = self._with_directory_totals(entries)
+        entries.sort(key=lambda e: e.path)
+        self.entries: List[TreeEntry] = entries
+        self._paths: List[str] = [e.path for e in entries]
+
+        self._by_extension: Dict[str, List[int]] = {}
+        self._by_kind: Dict[str, List[int]] = {}
+        by_size: Dict[str, List[Tuple[int, int]]] = {}
+        for pos, entry in enumerate(entries):
+            self._by_kind.setdefault(entry.kind, []).append(pos)
+            extension = file_extension(entry.name)
+            if not extension and entry.name.startswith("."):
+                extension = entry.name.lower() # "*.bashrc" passt auch auf ".bashrc"
+            self._by_extension.setdefault(extension, []).append(pos)
+            if entry.size is not None:
+                by_size.setdefault(entry.kind, []).append((entry.size, pos))
+
+        self._sizes: Dict[str, List[int]] = {}
+        self._size_positions: Dict[str, List[int]] = {}
+        for kind, pairs in by_size.items():
+            pairs.sort()
+            self._sizes[kind] = [size for size, _ in pairs]
+            self._size_positions[kind] = [pos for _, pos in pairs]
+
+    @staticmethod
+    def _with_directory_totals(entries: Iterable[TreeEntry]) -> List[TreeEntry]:
+        result: List[TreeEntry] = []
+        open_dirs: List[List[int]] = [] # [Tiefe, Position, Summe] der offenen Verzeichnisse
+
+        def close_dir() -> None:
+            _, pos, total = open_dirs.pop()
+            result[pos] = result[pos]._replace(size=total)
+            if open_dirs:
+                open_dirs[-1][2] += total
+
+        for entry in entries:
+            while open_dirs and open_dirs[-1][0] >= entry.depth:
+                close_dir()
+            if entry.kind == KIND_FILE and entry.size and open_dirs:
+                open_dirs[-1][2] += entry.size
+            if entry.kind == KIND_DIR:
+                open_dirs.append([entry.depth, len(result), 0])
+            result.append(entry)
+        while open_dirs:
+            close_dir()
+        return result
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # -- Candidate sets -----------------------------------------------------
+
+    def _prefix_range(self, prefix: str) -> range:
+        """Positions of all paths starting with `prefix` (plain string prefix)."""
+        lo = bisect_left(self._paths, prefix)
+        hi = bisect_left(self._paths, prefix + "\U0010ffff", lo)
+        return range(lo, hi)
+
+    def _size_candidates(self, kinds: Iterable[str], min_size: Optional[int],
+                         max_size: Optional[int]) -> List[int]:
+        positions: List[int] = []
+        for kind in kinds:
+            sizes = self._sizes.get(kind, [])
+            lo = bisect_left(sizes, min_size) if min_size is not None else 0
+            hi = bisect_right(sizes, max_size) if max_size is not None else len(sizes)
+            positions.extend(self._size_positions.get(kind, [])[lo:hi])
+        return positions
+
+    def find(self, glob: Optional[str] = None, min_size: Optional[int] = None,
+             max_size: Optional[int] = None, type: Optional[str] = None,
+             limit: Optional[int] = None) -> List[TreeEntry]:
+        """
+        Return matching entries sorted by path.
+
+        Args:
+            glob: Pattern matched against the entry name if it contains no '/',
+                  otherwise against the relative path (supports `**`)
+            min_size: Only entries with at least this many bytes
+            max_size: Only entries with at most this many bytes
+            type: Only entries of this kind ("file", "dir", "dir_symlink_no_follow")
+            limit: Return at most this many entries
+
+        The narrowest available index (extension, path prefix, size range or
+        kind) selects the candidates; the other conditions are checked only
+        on those.
+        """
+        kinds = [type] if type is not None else list(self._by_kind)
+        candidate_sets: List[Iterable[int]] = []
+        matcher = None
+        match_name = False
+
+        if glob is not None:
+            glob = glob.strip("/")
+            match_name = "/" not in glob
+            matcher = glob_to_regex(glob).match
+            extension = _SIMPLE_EXTENSION_GLOB.match(glob)
+            if extension:
+                candidate_sets.append(self._by_extension.get(extension.group(1).lower(), []))
+            elif not match_name:
+                literal = _WILDCARDS.split(glob, 1)[0]
+                directory = literal[:literal.rfind("/") + 1] if _WILDCARDS.search(glob) else glob
+                if directory:
+                    candidate_sets.append(self._prefix_range(directory))
+        if min_size is not None or max_size is not None:
+            candidate_sets.append(self._size_candidates(kinds, min_size, max_size))
+        if type is not None:
+            candidate_sets.append(self._by_kind.get(type, []))
+        if not candidate_sets:
+            candidate_sets.append(range(len(self.entries)))
+
+        candidates = sorted(min(candidate_sets, key=len))
+        results: List[TreeEntry] = []
+        for pos in candidates:
+            entry = self.entries[pos]
+            if type is not None and entry.kind != type:
+                continue
+            if min_size is not None and (entry.size is None or entry.size < min_size):
+                continue
+            if max_size is not None and (entry.size is None or entry.size > max_size):
+                continue
+            if matcher is not None and not matcher(entry.name if match_name else entry.path):
+                continue
+            results.append(entry)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def under(self, path: str) -> List[TreeEntry]:
+        """Return all entries below the directory `path` (not including it), sorted by path."""
+        return [self.entries[pos] for pos in self._prefix_range(path.strip("/") + "/")]
+
+    def largest(self, n: int, type: Optional[str] = KIND_FILE) -> List[TreeEntry]:
+        """Return the `n` largest entries of the given kind (all kinds if None), largest first."""
+        kinds = [type] if type is not None else list(self._sizes)
+        tops = []
+        for kind in kinds:
+            positions = self._size_positions.get(kind, [])
+            tops.extend(self.entries[pos] for pos in positions[-n:] if n > 0)
+        return heapq.nlargest(n, tops, key=lambda e: e.size)
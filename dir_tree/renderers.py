@@ -0,0 +1,280 @@
+# dir_tree/renderers.py
+
+"""
+Renderers (sinks) fed by a single traversal.
+
+DirectoryTree.walk(sinks) visits every entry once and hands it to all sinks,
+so any combination of outputs is produced in one pass over the file system.
+Each sink only does the work for its own output: the nested dict is built only
+when a TreeDictSink is present, file sizes are looked up only when a sink sets
+`needs_size`, and stat metadata only when a sink sets `needs_stat`.
+
+Example:
+    >>> with open("tree.ndjson", "w") as out:
+    ...     DirectoryTree(".").walk([NdjsonSink(out)])
+"""
+
+import io
+import csv
+import gzip
+import base64
+import html
+import json
+import os
+from typing import Any, Dict, List, Optional, TextIO
+
+from .entries import (TreeEntry, ScanEntry, KIND_DIR, KIND_FILE, KIND_DIR_SYMLINK,
+                      format_size)
+
+
+class TreeSink:
+    """
+    Base class for renderers. All hooks are optional.
+
+    Attributes:
+        needs_size: Set to True if visit() uses entry.size
+        needs_stat: Set to True if visit() uses entry.stat
+    """
+    needs_size = False
+    needs_stat = False
+
+    def start(self, tree: Any) -> None:
+        """Called once before the first entry with the DirectoryTree being walked."""
+
+    def visit(self, entry: ScanEntry) -> None:
+        """Called for every entry in tree order (directories before their children)."""
+
+    def leave(self, entry: ScanEntry) -> None:
+        """Called after the last child of a directory whose children were visited."""
+
+    def finish(self, tree: Any) -> None:
+        """Called once after the last entry."""
+
+
+class TreeDictSink(TreeSink):
+    """Builds the nested `tree` dict of the JSON output."""
+
+    def __init__(self):
+        self.tree: Dict[str, Any] = {}
+        self._stack: List[Dict[str, Any]] = [self.tree]
+
+    def visit(self, entry: ScanEntry) -> None:
+        parent = self._stack[-1]
+        if entry.kind == KIND_DIR:
+            children: Dict[str, Any] = {}
+            parent[entry.name] = children
+            if entry.descend:
+                self._stack.append(children)
+        elif entry.kind == KIND_DIR_SYMLINK:
+            parent[entry.name] = {"symlink_target": entry.target, "_type": KIND_DIR_SYMLINK}
+        else:
+            parent[entry.name] = None # Repräsentiert eine Datei oder ein Blatt im Baum
+
+    def leave(self, entry: ScanEntry) -> None:
+        self._stack.pop()
+
+
+class TreeEntrySink(TreeSink):
+    """Keeps the TreeEntry of every visited entry (DirectoryTree.entries, iter_entries())."""
+    needs_size = True
+
+    def __init__(self):
+        self.entries: List[TreeEntry] = []
+
+    def visit(self, entry: ScanEntry) -> None:
+        self.entries.append(entry.to_tree_entry())
+
+
+class TreePrintSink(TreeSink):
+    """Builds the lines of `tree_print` (without the root line)."""
+
+    def __init__(self, show_file_sizes: bool = False, prefix: str = ''):
+        self.show_file_sizes = show_file_sizes
+        self.needs_size = show_file_sizes
+        self.lines: List[str] = []
+        self._prefixes: List[str] = [prefix]
+
+    @staticmethod
+    def display_name(entry: ScanEntry, show_file_sizes: bool = False) -> str:
+        # Gefolgte Symlinks auf Verzeichnisse zeigen nur den Namen
+        if entry.kind == KIND_DIR or entry.target is None:
+            display = entry.name
+        else:
+            display = f"{entry.name} -> {entry.target}"
+        if show_file_sizes and entry.kind == KIND_FILE and entry.size is not None:
+            display += f" ({format_size(entry.size)})"
+        return display
+
+    def visit(self, entry: ScanEntry) -> None:
+        prefix = self._prefixes[-1]
+        connector = '└── ' if entry.is_last else '├── '
+        self.lines.append(f"{prefix}{connector}{self.display_name(entry, self.show_file_sizes)}")
+        if entry.descend:
+            self._prefixes.append(prefix + ('    ' if entry.is_last else '│   '))
+
+    def leave(self, entry: ScanEntry) -> None:
+        self._prefixes.pop()
+
+
+class NdjsonSink(TreeSink):
+    """
+    Writes one JSON object per entry and line, as the entry is visited.
+
+    Fields: path, depth, type, size, target and, with `with_stat`, the mtime
+    (seconds since the epoch), mode and inode from the entry's own lstat().
+    Nothing is kept in memory, so the export runs in constant memory.
+
+    The output is always valid UTF-8. A path or target that is not valid
+    UTF-8 is written with U+FFFD in place of the undecodable bytes, plus
+    `path_bytes` / `target_bytes` holding the original bytes in base64.
+    """
+    needs_size = True
+
+    def __init__(self, stream: TextIO, with_stat: bool = True):
+        self.stream = stream
+        self.with_stat = with_stat
+        self.needs_stat = with_stat
+        self._dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    @staticmethod
+    def _undecodable(value: str) -> bool:
+        try:
+            value.encode("utf-8")
+            return False
+        except UnicodeEncodeError: # Surrogate-Escapes aus nicht dekodierbaren Bytes
+            return True
+
+    def record(self, entry: ScanEntry) -> Dict[str, Any]:
+        record = {"path": entry.path, "depth": entry.depth, "type": entry.kind,
+                  "size": entry.size, "target": entry.target}
+        for field in ("path", "target"):
+            value = record[field]
+            if value is not None and not value.isascii() and self._undecodable(value):
+                raw = os.fsencode(value)
+                record[field] = raw.decode("utf-8", "replace")
+                record[f"{field}_bytes"] = base64.b64encode(raw).decode("ascii")
+        if self.with_stat:
+            st = entry.stat
+            record["mtime"] = st.st_mtime if st is not None else None
+            record["mode"] = st.st_mode if st is not None else None
+            record["inode"] = st.st_ino if st is not None else None
+        return record
+
+    def visit(self, entry: ScanEntry) -> None:
+        self.stream.write(self._dumps(self.record(entry)) + "\n")
+
+
+class CsvSink(TreeSink):
+    """Writes a CSV table with one row per entry."""
+    needs_size = True
+    columns = ("path", "depth", "type", "size", "target")
+
+    def __init__(self, stream: TextIO):
+        self._writer = csv.writer(stream)
+
+    def start(self, tree: Any) -> None:
+        self._writer.writerow(self.columns)
+
+    def visit(self, entry: ScanEntry) -> None:
+        self._writer.writerow((entry.path, entry.depth, entry.kind,
+                               "" if entry.size is None else entry.size,
+                               "" if entry.target is None else entry.target))
+
+
+class MarkdownSink(TreeSink):
+    """Writes the tree as a nested Markdown list."""
+
+    def __init__(self, stream: TextIO, show_file_sizes: bool = False):
+        self.stream = stream
+        self.show_file_sizes = show_file_sizes
+        self.needs_size = show_file_sizes
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        for char in "\\`*_[]<#":
+            text = text.replace(char, "\\" + char)
+        return text
+
+    def start(self, tree: Any) -> None:
+        self.stream.write(f"**{self._escape(tree.root_display_name())}/**\n\n")
+
+    def visit(self, entry: ScanEntry) -> None:
+        label = self._escape(TreePrintSink.display_name(entry, self.show_file_sizes))
+        if entry.kind == KIND_DIR:
+            label += "/"
+        self.stream.write(f"{'  ' * (entry.depth - 1)}- {label}\n")
+
+
+class HtmlSink(TreeSink):
+    """Writes the tree as nested HTML lists (a fragment, no <html> wrapper)."""
+
+    def __init__(self, stream: TextIO, show_file_sizes: bool = False):
+        self.stream = stream
+        self.show_file_sizes = show_file_sizes
+        self.needs_size = show_file_sizes
+        self._open_lists: List[bool] = []
+
+    def start(self, tree: Any) -> None:
+        self.stream.write(f'<div class="dir-tree"><span class="dir">{html.escape(tree.root_display_name())}</span>\n<ul>\n')
+
+    def visit(self, entry: ScanEntry) -> None:
+        label = html.escape(TreePrintSink.display_name(entry, self.show_file_sizes))
+        css = "dir" if entry.kind in (KIND_DIR, KIND_DIR_SYMLINK) else entry.kind
+        if entry.descend:
+            self.stream.write(f'<li class="{css}">{label}\n<ul>\n')
+        else:
+            self.stream.write(f'<li class="{css}">{label}</li>\n')
+
+    def leave(self, entry: ScanEntry) -> None:
+        self.stream.write("</ul>\n</li>\n")
+
+    def finish(self, tree: Any) -> None:
+        self.stream.write("</ul>\n</div>\n")
+
+
+COMPRESSIONS = ("gzip", "zstd")
+_OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+
+def open_output(path: str, compress: Optional[str] = None) -> TextIO:
+    """
+    Open `path` for writing text through a large write buffer, optionally compressed.
+
+    Args:
+        path: Output file
+        compress: None, "gzip" or "zstd" (needs the `zstandard` package);
+                  if None, a ".gz" or ".zst" suffix selects the compression
+
+    Returns:
+        A text stream; closing it flushes and closes the compressor and the file.
+        Undecodable bytes in file names (surrogate escapes) are written back as
+        the original bytes.
+    """
+    if compress is None:
+        if path.endswith(".gz"):
+            compress = "gzip"
+        elif path.endswith(".zst"):
+            compress = "zstd"
+    if compress is None:
+        return open(path, "w", encoding="utf-8", errors="surrogateescape", newline="",
+                    buffering=_OUTPUT_BUFFER_SIZE)
+    if compress == "gzip":
+        raw = gzip.open(path, "wb", compresslevel=6)
+    elif compress == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression needs the 'zstandard' package (pip install dir_tree[zstd])")
+        raw = zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+    else:
+        raise ValueError(f"Unknown compression: {compress!r} (expected one of {', '.join(COMPRESSIONS)})")
+    return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=_OUTPUT_BUFFER_SIZE),
+                            encoding="utf-8", errors="surrogateescape", newline="")
+
+
+RENDERERS = {
+    "ndjson": NdjsonSink,
+    "csv": CsvSink,
+    "markdown": MarkdownSink,
+    "html": HtmlSink,
+}
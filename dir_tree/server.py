@@ -0,0 +1,301 @@
+# dir_tree/server.py
+
+"""
+Local daemon that keeps warm DirectoryTree scans in memory.
+
+Editor integrations call `dir-tree` many times per second; a cold Python start
+plus a full scan per call is too slow. `dir-tree serve --socket PATH` starts a
+long-running process that answers tree requests over a Unix socket and keeps
+finished scans in an LRU cache bounded by an approximate memory budget.
+
+Protocol: the client sends one JSON object terminated by a newline and the
+server answers with one JSON object terminated by a newline.
+
+Request fields (all optional except `root`):
+    op                      "tree" (default) or "stats"
+    root                    Absolute path of the directory to scan
+    exclude_dirs            List of directory names to exclude
+    exclude_files           List of fnmatch patterns to exclude
+    follow_symlinks_in_tree Follow symlinks to directories
+    show_file_sizes         Show file sizes in tree_print
+    max_depth               Depth limit (null = unlimited)
+    one_file_system         Do not descend into other filesystems
+    exclude_mounts          List of mount points / filesystem types to leave out
+    format                  "text" (tree_print only) or "json" (full to_json output)
+
+Response fields:
+    ok      True on success
+    result  The rendered tree (for op "tree")
+    cached  True if the answer came from a still-valid cached scan
+    error   Error message if ok is False
+"""
+
+import os
+import json
+import stat
+import errno
+import signal
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .directory_tree import DirectoryTree
+
+DEFAULT_CACHE_MB: int = 256
+
+# Rough per-entry overhead of a scanned tree in memory (dict slot, key string,
+# print line object). Used only to keep the cache inside its memory budget.
+_ENTRY_OVERHEAD_BYTES: int = 400
+
+FORMATS = ("text", "json")
+
+
+class _CacheEntry:
+    __slots__ = ("tree", "dir_mtimes", "cost")
+
+    def __init__(self, tree: DirectoryTree, dir_mtimes: List[Tuple[str, int]], cost: int):
+        self.tree = tree
+        self.dir_mtimes = dir_mtimes
+        self.cost = cost
+
+
+class TreeCache:
+    """
+    LRU cache of scanned DirectoryTree instances with a memory bound.
+
+    A cached scan stays valid as long as the mtime of every directory it listed
+    is unchanged. Adding, removing or renaming an entry updates the mtime of
+    its parent directory, so structural changes are always detected. Changes to
+    the contents of existing files are not (their sizes may be stale when
+    show_file_sizes is used).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _estimate_cost(tree: DirectoryTree) -> int:
+        return sum(len(line) for line in tree.tree_print_lines) * 2 + \
+            (len(tree.tree_print_lines) + len(tree.scanned_dirs)) * _ENTRY_OVERHEAD_BYTES
+
+    @staticmethod
+    def _is_fresh(entry: _CacheEntry) -> bool:
+        for path, mtime in entry.dir_mtimes:
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def get(self, key: Tuple) -> Optional[DirectoryTree]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        # mtime validation happens outside the lock; it is the expensive part
+        if not self._is_fresh(entry):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                    self.total_bytes -= entry.cost
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.tree
+
+    def put(self, key: Tuple, tree: DirectoryTree, dir_mtimes: List[Tuple[str, int]]) -> None:
+        cost = self._estimate_cost(tree)
+        if cost > self.max_bytes:
+            return # Würde den gesamten Cache verdrängen
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.cost
+            self._entries[key] = _CacheEntry(tree, dir_mtimes, cost)
+            self.total_bytes += cost
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.cost
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class TreeService:
+    """Answers protocol requests using a TreeCache."""
+
+    def __init__(self, cache: Optional[TreeCache] = None):
+        self.cache = cache if cache is not None else TreeCache()
+
+    @staticmethod
+    def _cache_key(request: Dict[str, Any]) -> Tuple:
+        return (
+            os.path.abspath(request["root"]),
+            frozenset(request.get("exclude_dirs") or ()),
+            frozenset(request.get("exclude_files") or ()),
+            bool(request.get("follow_symlinks_in_tree", False)),
+            bool(request.get("show_file_sizes", False)),
+            request.get("max_depth"),
+            bool(request.get("one_file_system", False)),
+            frozenset(request.get("exclude_mounts") or ()),
+        )
+
+    def get_tree(self, request: Dict[str, Any]) -> Tuple[DirectoryTree, bool]:
+        key = self._cache_key(request)
+        tree = self.cache.get(key)
+        if tree is not None:
+            return tree, True
+
+        root, exclude_dirs, exclude_files, follow, sizes, max_depth, one_file_system, exclude_mounts = key
+        tree = DirectoryTree(
+            root_dir=root,
+            exclude_dirs=set(exclude_dirs),
+            exclude_files=set(exclude_files),
+            follow_symlinks_in_tree=follow,
+            show_file_sizes=sizes,
+            max_depth=max_depth,
+            one_file_system=one_file_system,
+            exclude_mounts=set(exclude_mounts),
+        )
+        # mtimes werden vor dem Listen jedes Verzeichnisses erfasst, nicht nach dem Scan:
+        # sonst stünde eine neuere mtime neben einem älteren Listing
+        tree.track_dir_mtimes = True
+        tree.scan()
+        self.cache.put(key, tree, tree.dir_mtimes)
+        return tree, False
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op", "tree")
+        if op == "stats":
+            return {"ok": True, "result": self.cache.stats()}
+        if op != "tree":
+            return {"ok": False, "error": f"Unknown op: {op!r}"}
+        if not request.get("root"):
+            return {"ok": False, "error": "Missing 'root'"}
+        fmt = request.get("format", "text")
+        if fmt not in FORMATS:
+            return {"ok": False, "error": f"Unknown format: {fmt!r}"}
+        if not os.path.isdir(request["root"]):
+            return {"ok": False, "error": f"Not a directory: {request['root']}"}
+
+        tree, cached = self.get_tree(request)
+        result = tree.tree_print() if fmt == "text" else tree.render_json()
+        return {"ok": True, "result": result, "cached": cached}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            response = self.server.service.handle(request)
+        except ValueError as e: # inkl. json.JSONDecodeError
+            response = {"ok": False, "error": f"Bad request: {e}"}
+        except Exception as e: # Der Daemon soll an einer einzelnen Anfrage nicht sterben
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """
+    Remove a socket file left behind by a daemon that is no longer running.
+
+    Raises:
+        OSError: if the path is not a socket, or a daemon still accepts
+                 connections on it
+    """
+    try:
+        st = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise OSError(errno.EEXIST, "Exists and is not a socket", socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError: # Niemand lauscht mehr: verwaiste Socket-Datei
+            os.unlink(socket_path)
+            return
+    raise OSError(errno.EADDRINUSE, "Another daemon is listening on this socket", socket_path)
+
+
+class TreeServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: TreeService):
+        """
+        Raises:
+            OSError: if socket_path exists and is not a stale socket (see _remove_stale_socket)
+        """
+        self.service = service
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def serve(socket_path: str, cache_mb: int = DEFAULT_CACHE_MB) -> None:
+    """Run the daemon in the foreground until interrupted."""
+    server = TreeServer(socket_path, TreeService(TreeCache(cache_mb * 1024 * 1024)))
+    if threading.current_thread() is threading.main_thread():
+        # SIGTERM wie Ctrl+C behandeln, damit die Socket-Datei aufgeräumt wird
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def send_request(socket_path: str, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Send one request to a running daemon and return the decoded response.
+
+    Args:
+        socket_path: Path of the daemon's Unix socket
+        request: Request object (see module docstring)
+        timeout: Socket timeout in seconds (None = block)
+
+    Returns:
+        The response object
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        return {"ok": False, "error": "Connection closed by server"}
+    return json.loads(line)
@@ -0,0 +1,388 @@
+# dir_tree/snapshot.py
+
+"""
+Compact binary snapshot format for scanned trees.
+
+A snapshot is meant to be opened with `mmap`: readers look up paths and render
+subtrees straight from the mapped file, without parsing or loading it as a
+whole. All integers are little-endian.
+
+Layout:
+    header        HEADER (see below)
+    string data   UTF-8 bytes of all distinct names and symlink targets
+    string index  (string_count + 1) x u64 start offsets into the string data
+    node table    node_count x NODE records, breadth-first, so the children of
+                  a directory are contiguous and sorted by name
+    path index    node_count x u32 node ids, sorted by relative path (UTF-8 bytes)
+
+Header fields: magic, version, flags (bit 0: show_file_sizes), node_count,
+string_count, root display name id, and the offsets of the four sections.
+
+Node fields: parent id, name id, first child id, child count, symlink target id,
+kind, size. Node 0 is the root. Missing ids are NO_ID. The size is the file size
+for files, the total size of all files below for directories, and -1 if unknown.
+"""
+
+import os
+import mmap
+import struct
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .directory_tree import DirectoryTree
+from .entries import TreeEntry, ScanEntry, KIND_DIR, KIND_FILE, KIND_DIR_SYMLINK, KIND_MARKER
+from .renderers import TreeSink
+
+MAGIC = b"DIRTREE\x00"
+VERSION = 1
+FLAG_SHOW_FILE_SIZES = 0x1
+
+HEADER = struct.Struct("<8sHHIIIQQQQ")
+NODE = struct.Struct("<IIIIIBxxxq")
+OFFSET = struct.Struct("<Q")
+NODE_ID = struct.Struct("<I")
+NO_ID = 0xFFFFFFFF
+
+_KIND_CODES = {KIND_DIR: 1, KIND_FILE: 2, KIND_DIR_SYMLINK: 3, KIND_MARKER: 4}
+_KIND_NAMES = {code: kind for kind, code in _KIND_CODES.items()}
+
+
+class SnapshotError(ValueError):
+    """Raised when a file is not a valid snapshot."""
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def write_snapshot(tree: DirectoryTree, dest: Union[str, BinaryIO]) -> None:
+    """
+    Write the last scan of `tree` as a snapshot.
+
+    Args:
+        tree: A DirectoryTree on which scan(keep_entries=True) has been called
+        dest: File path (written atomically) or binary file object
+    """
+    _write_entries(tree.iter_entries(), os.path.basename(tree.root_dir), tree.root_display_name(),
+                   tree.show_file_sizes, dest)
+
+
+def _write_entries(entries: Iterable[TreeEntry], root_basename: str, root_display_name: str,
+                   show_file_sizes: bool, dest: Union[str, BinaryIO]) -> None:
+    if isinstance(dest, (str, os.PathLike)):
+        tmp_path = f"{dest}.tmp"
+        with open(tmp_path, "wb") as f:
+            _write(entries, root_basename, root_display_name, show_file_sizes, f)
+        os.replace(tmp_path, dest)
+    else:
+        _write(entries, root_basename, root_display_name, show_file_sizes, dest)
+
+
+class SnapshotSink(TreeSink):
+    """
+    Renderer that writes a snapshot from the same traversal as other outputs,
+    using the sizes gathered during the walk instead of a second stat pass.
+    """
+    needs_size = True
+
+    def __init__(self, dest: Union[str, BinaryIO]):
+        self.dest = dest
+        self._entries: List[TreeEntry] = []
+
+    def visit(self, entry: ScanEntry) -> None:
+        self._entries.append(entry.to_tree_entry())
+
+    def finish(self, tree: DirectoryTree) -> None:
+        _write_entries(self._entries, os.path.basename(tree.root_dir), tree.root_display_name(),
+                       tree.show_file_sizes, self.dest)
+        self._entries = []
+
+
+def _write(source: Iterable[TreeEntry], root_basename: str, root_display_name: str,
+           show_file_sizes: bool, f: BinaryIO) -> None:
+    strings: Dict[str, int] = {}
+
+    def string_id(value: Optional[str]) -> int:
+        if value is None:
+            return NO_ID
+        sid = strings.get(value)
+        if sid is None:
+            sid = strings[value] = len(strings)
+        return sid
+
+    # Tiefensuche (Reihenfolge von iter_entries) -> Eltern und Kinder je Knoten
+    root = TreeEntry("", root_basename, 0, KIND_DIR, None, None)
+    entries: List[TreeEntry] = [root]
+    parents: List[int] = [NO_ID]
+    children: List[List[int]] = [[]]
+    open_dirs = [0] # open_dirs[d] = DFS-Index des offenen Verzeichnisses auf Tiefe d
+    for entry in source:
+        del open_dirs[entry.depth:]
+        parent = open_dirs[-1]
+        index = len(entries)
+        entries.append(entry)
+        parents.append(parent)
+        children.append([])
+        children[parent].append(index)
+        if entry.kind == KIND_DIR:
+            open_dirs.append(index)
+
+    # Verzeichnisgrößen = Summe aller Dateien darunter
+    sizes = [e.size if e.kind == KIND_FILE and e.size is not None else (0 if e.kind == KIND_DIR else -1)
+             for e in entries]
+    for index in range(len(entries) - 1, 0, -1):
+        if entries[index].kind in (KIND_FILE, KIND_DIR) and sizes[index] > 0:
+            sizes[parents[index]] += sizes[index]
+
+    # Breitensuche, damit die Kinder eines Verzeichnisses zusammenhängend liegen
+    order = [0]
+    for index in order:
+        order.extend(children[index])
+    bfs_id = [0] * len(entries)
+    for new_id, index in enumerate(order):
+        bfs_id[index] = new_id
+
+    root_name_id = string_id(root_display_name)
+    node_records = bytearray()
+    for index in order:
+        entry = entries[index]
+        kids = children[index]
+        node_records += NODE.pack(
+            bfs_id[parents[index]] if parents[index] != NO_ID else NO_ID,
+            string_id(entry.name),
+            bfs_id[kids[0]] if kids else NO_ID,
+            len(kids),
+            string_id(entry.target),
+            _KIND_CODES[entry.kind],
+            sizes[index],
+        )
+
+    path_index = sorted(range(len(entries)), key=lambda i: entries[i].path.encode("utf-8", "surrogateescape"))
+    path_records = b"".join(NODE_ID.pack(bfs_id[i]) for i in path_index)
+
+    string_data = bytearray()
+    string_offsets = bytearray()
+    for value in strings: # dict behält die Einfügereihenfolge = String-ID
+        string_offsets += OFFSET.pack(len(string_data))
+        string_data += value.encode("utf-8", "surrogateescape")
+    string_offsets += OFFSET.pack(len(string_data))
+
+    string_data_offset = HEADER.size
+    string_index_offset = _pad8(string_data_offset + len(string_data))
+    nodes_offset = string_index_offset + len(string_offsets)
+    path_index_offset = nodes_offset + len(node_records)
+
+    f.write(HEADER.pack(MAGIC, VERSION, FLAG_SHOW_FILE_SIZES if show_file_sizes else 0,
+                        len(entries), len(strings), root_name_id,
+                        string_data_offset, string_index_offset, nodes_offset, path_index_offset))
+    f.write(string_data)
+    f.write(b"\0" * (string_index_offset - string_data_offset - len(string_data)))
+    f.write(string_offsets)
+    f.write(node_records)
+    f.write(path_records)
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot file through mmap.
+
+    Only the pages touched by a lookup are read from disk, so opening a large
+    snapshot and querying one subtree is cheap.
+
+    Example:
+        >>> with Snapshot("tree.snap") as snap:
+        ...     print(snap.tree_print("src/dir_tree"))
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Leere Datei lässt sich nicht mappen
+            self._file.close()
+            raise SnapshotError(f"{path}: empty file")
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise SnapshotError(f"{path}: file too short")
+        (magic, version, flags, self.node_count, self.string_count, self._root_name_id,
+         self._strings_off, self._string_index_off, self._nodes_off, self._path_index_off) = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotError(f"{path}: not a dir_tree snapshot (version {VERSION})")
+        self.show_file_sizes = bool(flags & FLAG_SHOW_FILE_SIZES)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of entries, excluding the root."""
+        return self.node_count - 1
+
+    @property
+    def root_name(self) -> str:
+        """First line of tree_print() for the whole snapshot."""
+        return self._string(self._root_name_id)
+
+    # -- Low-level access -------------------------------------------------
+
+    def _node(self, node_id: int) -> Tuple[int, int, int, int, int, int, int]:
+        return NODE.unpack_from(self._mm, self._nodes_off + node_id * NODE.size)
+
+    def _string_bytes(self, string_id: int) -> bytes:
+        pos = self._string_index_off + string_id * OFFSET.size
+        start, end = struct.unpack_from("<QQ", self._mm, pos)
+        return self._mm[self._strings_off + start:self._strings_off + end]
+
+    def _string(self, string_id: int) -> Optional[str]:
+        if string_id == NO_ID:
+            return None
+        return self._string_bytes(string_id).decode("utf-8", "surrogateescape")
+
+    def _path_of(self, node_id: int) -> str:
+        parts = []
+        while node_id != 0:
+            parent, name_id = self._node(node_id)[:2]
+            parts.append(self._string(name_id))
+            node_id = parent
+        return "/".join(reversed(parts))
+
+    # -- Lookups ----------------------------------------------------------
+
+    def lookup(self, path: str) -> int:
+        """
+        Return the node id of the entry at `path` (relative, '/'-separated, '' = root).
+
+        Walks down from the root with a binary search over each directory's
+        children. They are stored in tree_print order, i.e. sorted as str, which
+        differs from the byte order for names that are not valid UTF-8, so the
+        names are compared decoded.
+
+        Raises:
+            KeyError: if the path is not in the snapshot
+        """
+        node_id = 0
+        for part in path.strip("/").split("/") if path.strip("/") else ():
+            first, count = self._node(node_id)[2:4]
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._string(self._node(first + mid)[1]) < part:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo == count or self._string(self._node(first + lo)[1]) != part:
+                raise KeyError(path)
+            node_id = first + lo
+        return node_id
+
+    def entry(self, path: str) -> TreeEntry:
+        """Return the TreeEntry at `path` (depth relative to the snapshot root)."""
+        node_id = self.lookup(path)
+        path = self._path_of(node_id)
+        return self._entry(node_id, path, path.count("/") + 1 if path else 0)
+
+    def _entry(self, node_id: int, path: str, depth: int) -> TreeEntry:
+        _, name_id, _, _, target_id, kind, size = self._node(node_id)
+        kind = _KIND_NAMES[kind]
+        return TreeEntry(path, self._string(name_id) if node_id else "", depth, kind,
+                         size if size >= 0 and kind in (KIND_FILE, KIND_DIR) else None,
+                         self._string(target_id))
+
+    def iter_entries(self, path: str = "") -> Iterator[TreeEntry]:
+        """
+        Yield the entries below `path` in tree_print order, like
+        DirectoryTree.iter_entries(). Paths and depths stay relative to the
+        snapshot root. Directory sizes are the totals of the files below them.
+        """
+        start = self.lookup(path)
+        base = self._path_of(start)
+        base_depth = base.count("/") + 1 if base else 0
+        stack = [(base, base_depth, iter(self._child_range(start)))]
+        while stack:
+            rel_dir, depth, children = stack[-1]
+            for child, _ in children:
+                name = self._string(self._node(child)[1])
+                child_path = f"{rel_dir}/{name}" if rel_dir else name
+                entry = self._entry(child, child_path, depth + 1)
+                yield entry
+                if entry.kind == KIND_DIR:
+                    stack.append((child_path, depth + 1, iter(self._child_range(child))))
+                    break
+            else:
+                stack.pop()
+
+    def iter_prefix(self, prefix: str) -> Iterator[str]:
+        """
+        Yield all paths equal to `prefix` or below it, in sorted path order,
+        using a binary search over the path index.
+        """
+        prefix = prefix.strip("/")
+        key = prefix.encode("utf-8", "surrogateescape")
+        lo, hi = 0, self.node_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._path_bytes_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        for pos in range(lo, self.node_count):
+            path = self._path_bytes_at(pos)
+            if not path.startswith(key):
+                break
+            if not key or path == key or path[len(key):len(key) + 1] == b"/":
+                yield path.decode("utf-8", "surrogateescape")
+
+    def _path_bytes_at(self, pos: int) -> bytes:
+        node_id = NODE_ID.unpack_from(self._mm, self._path_index_off + pos * NODE_ID.size)[0]
+        return self._path_of(node_id).encode("utf-8", "surrogateescape")
+
+    # -- Rendering --------------------------------------------------------
+
+    def tree_print(self, path: str = "") -> str:
+        """
+        Render the subtree at `path` exactly like DirectoryTree.tree_print()
+        renders it (for path '' the output is identical to the scanned tree).
+        """
+        node_id = self.lookup(path)
+        if node_id == 0:
+            lines = [self.root_name]
+        else:
+            lines = [self._display_name(node_id)]
+        self._render_children(node_id, "", lines)
+        return "\n".join(lines).rstrip()
+
+    def _display_name(self, node_id: int) -> str:
+        _, name_id, _, _, target_id, kind, size = self._node(node_id)
+        display = self._string(name_id)
+        if kind == _KIND_CODES[KIND_DIR]:
+            return display # Gefolgte Symlinks zeigen nur den Namen
+        if target_id != NO_ID:
+            display += f" -> {self._string(target_id)}"
+        if kind == _KIND_CODES[KIND_FILE] and self.show_file_sizes and size >= 0:
+            display += f" ({DirectoryTree._format_size(size)})"
+        return display
+
+    def _render_children(self, node_id: int, prefix: str, lines: List[str]) -> None:
+        stack = [(prefix, iter(self._child_range(node_id)))]
+        while stack:
+            prefix, children = stack[-1]
+            for child, is_last in children:
+                lines.append(f"{prefix}{'└── ' if is_last else '├── '}{self._display_name(child)}")
+                if self._node(child)[5] == _KIND_CODES[KIND_DIR]:
+                    stack.append((prefix + ('    ' if is_last else '│   '), iter(self._child_range(child))))
+                    break
+            else:
+                stack.pop()
+
+    def _child_range(self, node_id: int) -> Iterator[Tuple[int, bool]]:
+        first, count = self._node(node_id)[2:4]
+        for i in range(count):
+            yield first + i, i == count - 1
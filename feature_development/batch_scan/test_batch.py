@@ -0,0 +1,96 @@
+"""
+Tests for DirectoryTree.batch and the shared ExclusionMatcher.
+"""
+
+import os
+import time
+import tempfile
+
+from dir_tree import DirectoryTree, ExclusionMatcher
+
+
+def _make_roots(base):
+    roots = []
+    for name in ("repo_a", "repo_b"):
+        root = os.path.join(base, name)
+        os.makedirs(os.path.join(root, "src"))
+        os.makedirs(os.path.join(root, "node_modules"))
+        for rel in ("README.md", "build.log", "src/main.py"):
+            with open(os.path.join(root, rel), "w") as f:
+                f.write(name)
+        roots.append(root)
+    return roots
+
+
+def test_matcher_matches_fnmatch_semantics():
+    matcher = ExclusionMatcher({"node_modules"}, {"*.log", "LICENSE", "test_?.py", "[ab]*.tmp"})
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.makedirs(os.path.join(tmpdir, "node_modules"))
+        assert matcher.is_excluded("node_modules", os.path.join(tmpdir, "node_modules"))
+    # Ein Dateiname, der wie ein ausgeschlossenes Verzeichnis heißt, bleibt erhalten
+    assert not matcher.is_excluded("node_modules", "/nonexistent/node_modules")
+    assert matcher.is_excluded("debug.log", "x")
+    assert matcher.is_excluded("LICENSE", "x")
+    assert matcher.is_excluded("test_1.py", "x")
+    assert not matcher.is_excluded("test_10.py", "x")
+    assert matcher.is_excluded("a1.tmp", "x")
+    assert not matcher.is_excluded("c1.tmp", "x")
+    assert not ExclusionMatcher().is_excluded("anything", "x")
+
+
+def test_batch_matches_individual_scans():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        roots = _make_roots(tmpdir)
+        options = dict(exclude_dirs={"node_modules"}, exclude_files={"*.log"}, show_file_sizes=True)
+        results = {tree.root_dir: tree for tree in DirectoryTree.batch(roots, max_workers=2, **options)}
+        assert set(results) == set(roots)
+        for root in roots:
+            single = DirectoryTree(root, **options)
+            assert results[root].render_json() == single.to_json()
+            assert "build.log" not in results[root].tree_print()
+
+
+def test_batch_deduplicates_aliases():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        roots = _make_roots(tmpdir)
+        link = os.path.join(tmpdir, "alias")
+        os.symlink(roots[0], link)
+        scans = []
+        original_scan = DirectoryTree.scan
+
+        def counting_scan(self):
+            scans.append(self.root_dir)
+            return original_scan(self)
+
+        DirectoryTree.scan = counting_scan
+        try:
+            results = list(DirectoryTree.batch([roots[0], link, roots[0] + "/", roots[1]]))
+        finally:
+            DirectoryTree.scan = original_scan
+
+        assert len(scans) == 2
+        by_root = {tree.root_dir: tree for tree in results}
+        assert set(by_root) == {roots[0], link, roots[1]}
+        assert by_root[link].tree == by_root[roots[0]].tree
+        assert by_root[link].tree_print().startswith("alias -> ")
+
+
+def test_closing_batch_skips_queued_roots(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        roots = []
+        for i in range(20):
+            roots.append(os.path.join(tmpdir, f"root{i}"))
+            os.makedirs(roots[-1])
+        scanned = []
+        scan = DirectoryTree.scan
+
+        def recording_scan(self, *args, **kwargs):
+            scanned.append(self.root_dir)
+            time.sleep(0.02)
+            return scan(self, *args, **kwargs)
+
+        monkeypatch.setattr(DirectoryTree, "scan", recording_scan)
+        batch = DirectoryTree.batch(roots, max_workers=1)
+        next(batch)
+        batch.close()
+        assert len(scanned) < len(roots)
@@ -0,0 +1,84 @@
+"""
+Tests for the mmap-readable binary snapshot format.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.snapshot import Snapshot, SnapshotError
+
+
+def _make_tree(root):
+    os.makedirs(os.path.join(root, "src", "pkg"))
+    os.makedirs(os.path.join(root, "docs"))
+    files = {"README.md": 120, "src/main.py": 2048, "src/pkg/util.py": 10, "src/pkg/ünïcode.txt": 5}
+    for rel, size in files.items():
+        with open(os.path.join(root, rel), "wb") as f:
+            f.write(b"x" * size)
+    os.symlink("src/pkg", os.path.join(root, "pkg_link"))
+    os.symlink("src/main.py", os.path.join(root, "main_link.py"))
+    os.symlink("missing", os.path.join(root, "dangling"))
+
+
+def _scan(root, **options):
+    tree = DirectoryTree(root, **options)
+    tree.scan(keep_entries=True)
+    return tree
+
+
+def test_round_trip_renders_identical_tree_print():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "project")
+        _make_tree(root)
+        for options in ({}, {"show_file_sizes": True}, {"follow_symlinks_in_tree": True}):
+            tree = _scan(root, **options)
+            snap_path = os.path.join(tmpdir, "tree.snap")
+            tree.write_snapshot(snap_path)
+            with Snapshot(snap_path) as snap:
+                assert snap.tree_print() == tree.tree_print()
+                assert len(snap) == len(tree.tree_print_lines)
+
+
+def test_subtree_lookup_and_sizes():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "project")
+        _make_tree(root)
+        tree = _scan(root, show_file_sizes=True)
+        snap_path = os.path.join(tmpdir, "tree.snap")
+        tree.write_snapshot(snap_path)
+        with Snapshot(snap_path) as snap:
+            assert snap.tree_print("src/pkg") == "pkg\n├── util.py (10.0 B)\n└── ünïcode.txt (5.0 B)"
+            assert snap.entry("src").size == 2048 + 10 + 5
+            assert snap.entry("").size == 120 + 2048 + 10 + 5 + 2048 # main_link.py zählt als Datei
+            assert snap.entry("pkg_link").kind == "dir_symlink_no_follow"
+            assert snap.entry("main_link.py").target == "src/main.py"
+            assert [e.path for e in snap.iter_entries("src")] == \
+                ["src/main.py", "src/pkg", "src/pkg/util.py", "src/pkg/ünïcode.txt"]
+            assert list(snap.iter_prefix("src/pkg")) == ["src/pkg", "src/pkg/util.py", "src/pkg/ünïcode.txt"]
+            with pytest.raises(KeyError):
+                snap.lookup("src/nope")
+
+
+def test_entries_match_directory_tree():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "project")
+        _make_tree(root)
+        tree = _scan(root)
+        snap_path = os.path.join(tmpdir, "tree.snap")
+        tree.write_snapshot(snap_path)
+        with Snapshot(snap_path) as snap:
+            scanned = list(tree.iter_entries())
+            loaded = [e._replace(size=None) if e.kind == "dir" else e for e in snap.iter_entries()]
+            assert loaded == scanned
+
+
+def test_rejects_foreign_files():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "not.snap")
+        with open(path, "wb") as f:
+            f.write(b"{" * 100)
+        with pytest.raises(SnapshotError):
+            Snapshot(path)
@@ -0,0 +1,124 @@
+"""
+Tests for cancellable scans with checkpoint/resume.
+"""
+
+import os
+import signal
+import tempfile
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.checkpoint import CancelToken, Checkpointer, CheckpointError, ScanCancelled
+from dir_tree.renderers import NdjsonSink, TreeSink
+
+
+class _CancelAfter(TreeSink):
+    """Cancels the token after `count` visited entries."""
+    needs_size = True
+
+    def __init__(self, token, count):
+        self.token = token
+        self.count = count
+
+    def visit(self, entry):
+        self.count -= 1
+        if self.count == 0:
+            self.token.cancel()
+
+
+def _make_tree(root):
+    for i in range(6):
+        for j in range(5):
+            path = os.path.join(root, f"dir{i}", f"sub{j}")
+            os.makedirs(path)
+            for k in range(4):
+                with open(os.path.join(path, f"f{k}.txt"), "w") as f:
+                    f.write("x" * (i * 100 + j * 10 + k))
+    os.symlink("dir0", os.path.join(root, "link"))
+
+
+def _tree(root):
+    tree = DirectoryTree(root, exclude_files={"*.ckpt*"}, show_file_sizes=True)
+    tree.tick_entries = 7
+    return tree
+
+
+def test_resume_matches_uninterrupted_run():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        _make_tree(root)
+        checkpoint = os.path.join(tmpdir, "scan.ckpt")
+        expected = _tree(root)
+        expected.scan()
+
+        for stop_after in (1, 40, 97, 150):
+            token = CancelToken()
+            first = _tree(root)
+            with pytest.raises(ScanCancelled):
+                first.walk([_CancelAfter(token, stop_after)], cancel=token,
+                           checkpoint=Checkpointer(checkpoint, interval=3600))
+            assert os.path.exists(checkpoint)
+
+            # Ein anderer Renderer darf fortsetzen; das Journal liefert die bereits besuchten Einträge
+            resumed = _tree(root)
+            resumed.scan(checkpoint=Checkpointer(checkpoint, resume=True))
+            assert resumed.render_json() == expected.render_json()
+            assert sorted(resumed.scanned_dirs) == sorted(expected.scanned_dirs)
+            assert not os.path.exists(checkpoint) and not os.path.exists(checkpoint + ".journal")
+
+
+def test_resume_twice_and_option_mismatch():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        _make_tree(root)
+        checkpoint = os.path.join(tmpdir, "scan.ckpt")
+        expected = []
+        DirectoryTree(root).walk([_Collect(expected)])
+
+        token = CancelToken()
+        with pytest.raises(ScanCancelled):
+            _tree(root).walk([_CancelAfter(token, 30)], cancel=token, checkpoint=Checkpointer(checkpoint))
+        token = CancelToken()
+        with pytest.raises(ScanCancelled):
+            _tree(root).walk([_CancelAfter(token, 50)], cancel=token,
+                             checkpoint=Checkpointer(checkpoint, resume=True))
+
+        with pytest.raises(CheckpointError):
+            DirectoryTree(root, max_depth=1).walk([], checkpoint=Checkpointer(checkpoint, resume=True))
+        # stat-Daten wurden beim ersten Lauf nicht ermittelt
+        with pytest.raises(CheckpointError):
+            _tree(root).walk([NdjsonSink(open(os.devnull, "w"))], checkpoint=Checkpointer(checkpoint, resume=True))
+
+        seen = []
+        _tree(root).walk([_Collect(seen)], checkpoint=Checkpointer(checkpoint, resume=True))
+        assert seen == expected
+
+
+class _Collect(TreeSink):
+    def __init__(self, paths):
+        self.paths = paths
+
+    def visit(self, entry):
+        self.paths.append(entry.path)
+
+
+def test_signal_handlers_cancel_once_and_are_restored():
+    previous = signal.getsignal(signal.SIGINT)
+    cancel = CancelToken()
+    cancel.install_signal_handlers((signal.SIGINT,))
+    try:
+        signal.raise_signal(signal.SIGINT)
+        assert cancel.cancelled
+        # Ein zweites Ctrl+C geht an den vorherigen Handler
+        with pytest.raises(KeyboardInterrupt):
+            signal.raise_signal(signal.SIGINT)
+        assert signal.getsignal(signal.SIGINT) is previous
+    finally:
+        cancel.restore_signal_handlers()
+    assert signal.getsignal(signal.SIGINT) is previous
+
+    cancel = CancelToken()
+    cancel.install_signal_handlers((signal.SIGINT,))
+    cancel.restore_signal_handlers()
+    assert signal.getsignal(signal.SIGINT) is previous
@@ -0,0 +1,141 @@
+"""
+Tests for the `dir-tree serve` daemon and its scan cache.
+"""
+
+import errno
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.server import TreeCache, TreeServer, TreeService, send_request
+
+
+def _make_tree(root):
+    os.makedirs(os.path.join(root, "src", "pkg"))
+    for rel in ("README.md", "src/main.py", "src/pkg/util.py"):
+        with open(os.path.join(root, rel), "w") as f:
+            f.write("x" * 10)
+
+
+def test_cache_hit_and_invalidation():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        service = TreeService()
+        request = {"root": tmpdir, "format": "text"}
+
+        first = service.handle(request)
+        second = service.handle(request)
+        assert first["ok"] and not first["cached"]
+        assert second["cached"]
+        assert first["result"] == second["result"]
+
+        # Neue Datei in einem Unterverzeichnis ändert dessen mtime
+        time.sleep(0.01)
+        with open(os.path.join(tmpdir, "src", "pkg", "new.py"), "w") as f:
+            f.write("")
+        third = service.handle(request)
+        assert not third["cached"]
+        assert "new.py" in third["result"]
+
+
+def test_change_after_listing_invalidates_cache(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        pkg = os.path.join(tmpdir, "src", "pkg")
+        list_dir = DirectoryTree._list_dir
+
+        def list_then_change(self, current_dir):
+            items = list_dir(self, current_dir)
+            if current_dir == pkg and not os.path.exists(os.path.join(pkg, "late.py")):
+                # Änderung nach dem Listen, aber noch während des Scans
+                time.sleep(0.01)
+                with open(os.path.join(pkg, "late.py"), "w") as f:
+                    f.write("")
+            return items
+
+        monkeypatch.setattr(DirectoryTree, "_list_dir", list_then_change)
+        service = TreeService()
+        first = service.handle({"root": tmpdir})
+        assert "late.py" not in first["result"]
+        second = service.handle({"root": tmpdir})
+        assert not second["cached"]
+        assert "late.py" in second["result"]
+
+
+def test_max_depth_is_part_of_the_key():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        service = TreeService()
+        full = service.handle({"root": tmpdir})
+        shallow = service.handle({"root": tmpdir, "max_depth": 1})
+        assert "util.py" in full["result"]
+        assert "util.py" not in shallow["result"]
+        assert not shallow["cached"]
+
+
+def test_lru_eviction_respects_budget():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        tree = DirectoryTree(tmpdir)
+        tree.scan()
+        cost = TreeCache._estimate_cost(tree)
+        cache = TreeCache(max_bytes=cost * 2)
+        for i in range(3):
+            cache.put(("key", i), tree, [])
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        assert cache.get(("key", 0)) is None
+        assert cache.get(("key", 2)) is tree
+
+
+def test_socket_round_trip():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        socket_path = os.path.join(tmpdir, "dir-tree.sock")
+        server = TreeServer(socket_path, TreeService())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            response = send_request(socket_path, {"root": tmpdir, "format": "json",
+                                                  "exclude_files": ["*.sock"]}, timeout=5)
+            assert response["ok"]
+            assert '"main.py": null' in response["result"]
+            assert "dir-tree.sock" not in response["result"]
+            bad = send_request(socket_path, {"root": tmpdir, "format": "xml"}, timeout=5)
+            assert not bad["ok"]
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert not os.path.exists(socket_path)
+
+
+def test_socket_path_is_only_replaced_when_stale():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = os.path.join(tmpdir, "dir-tree.sock")
+        with open(socket_path, "w") as f:
+            f.write("keep me")
+        with pytest.raises(OSError):
+            TreeServer(socket_path, TreeService())
+        with open(socket_path) as f:
+            assert f.read() == "keep me"
+        os.remove(socket_path)
+
+        # Socket-Datei eines beendeten Daemons wird ersetzt
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+        server = TreeServer(socket_path, TreeService())
+        try:
+            # Ein laufender Daemon behält seinen Socket
+            with pytest.raises(OSError) as info:
+                TreeServer(socket_path, TreeService())
+            assert info.value.errno == errno.EADDRINUSE
+            assert os.path.exists(socket_path)
+        finally:
+            server.server_close()
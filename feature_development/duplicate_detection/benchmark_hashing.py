@@ -0,0 +1,88 @@
+"""
+Benchmark hashing throughput of dir_tree.duplicates.
+
+Creates a temporary tree with duplicate and near-duplicate files and measures
+  - hash_file() throughput for buffered reads vs. mmap, per algorithm
+  - find_duplicates() with 1 worker vs. the default pool
+
+Usage:
+    python feature_development/duplicate_detection/benchmark_hashing.py [--mb 256]
+
+Files are read from the page cache after the first run, so the numbers show
+hashing cost rather than disk speed.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+from dir_tree import duplicates
+from dir_tree.duplicates import hash_file, find_duplicates
+
+
+def make_files(root, total_mb):
+    """Write 4 large and many small files; every second file has a duplicate."""
+    files = []
+    large = 16 * 1024 * 1024
+    small = 64 * 1024
+    budget = total_mb * 1024 * 1024
+    sizes = [large] * 4 + [small] * max(0, (budget - 4 * large) // small)
+    for i, size in enumerate(sizes):
+        path = os.path.join(root, f"file_{i:05d}.bin")
+        if i % 2 and sizes[i - 1] == size:
+            with open(files[-1][1], "rb") as src:
+                data = src.read()
+            if i % 4 == 3: # Beinahe-Duplikat: gleicher Kopf, anderes Ende
+                data = data[:-1] + bytes([data[-1] ^ 0xFF])
+        else:
+            data = os.urandom(size)
+        with open(path, "wb") as f:
+            f.write(data)
+        files.append((os.path.basename(path), path, size))
+    return files
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_hash_file(files, algorithm):
+    total = sum(size for _, _, size in files)
+    results = {}
+    for label, threshold in (("buffered", float("inf")), ("mmap", 0)):
+        duplicates.MMAP_THRESHOLD = threshold
+        _, seconds = timed(lambda: [hash_file(path, algorithm) for _, path, _ in files])
+        results[label] = total / seconds / 1024 ** 2
+    duplicates.MMAP_THRESHOLD = 8 * 1024 * 1024
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=int, default=256, help="Total size of the generated files in MB")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        files = make_files(root, args.mb)
+        total = sum(size for _, _, size in files)
+        print(f"{len(files)} files, {total / 1024 ** 2:.0f} MB")
+        hash_file(files[0][1]) # Page-Cache aufwärmen
+
+        print("\nhash_file() throughput (MB/s, single thread):")
+        for algorithm in ("blake2b", "sha256", "md5"):
+            results = bench_hash_file(files, algorithm)
+            print(f"  {algorithm:<8} buffered {results['buffered']:8.0f}   mmap {results['mmap']:8.0f}")
+
+        print("\nfind_duplicates() wall time:")
+        for workers in (1, None):
+            groups, seconds = timed(find_duplicates, files, workers)
+            label = "default pool" if workers is None else f"{workers} worker"
+            print(f"  {label:<13} {seconds:6.2f} s  {total / seconds / 1024 ** 2:8.0f} MB/s  "
+                  f"{len(groups)} groups")
+
+
+if __name__ == "__main__":
+    main()
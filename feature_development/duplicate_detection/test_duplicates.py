@@ -0,0 +1,83 @@
+"""
+Tests for duplicate file detection with staged hashing.
+"""
+
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+
+from dir_tree import DirectoryTree
+from dir_tree import duplicates
+from dir_tree.directory_tree import main
+from dir_tree.duplicates import find_duplicates, hash_file
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _make_tree(root):
+    big = os.urandom(20000)
+    _write(os.path.join(root, "a", "big.bin"), big)
+    _write(os.path.join(root, "b", "copy.bin"), big)
+    _write(os.path.join(root, "b", "tail.bin"), big[:-1] + bytes([big[-1] ^ 1])) # gleicher Kopf
+    _write(os.path.join(root, "a", "small.txt"), b"hello")
+    _write(os.path.join(root, "b", "small.txt"), b"hello")
+    _write(os.path.join(root, "empty1"), b"")
+    _write(os.path.join(root, "empty2"), b"")
+    os.link(os.path.join(root, "a", "big.bin"), os.path.join(root, "b", "hard.bin"))
+    os.symlink("a/big.bin", os.path.join(root, "link.bin"))
+
+
+def test_staged_detection():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        tree = DirectoryTree(tmpdir, detect_duplicates=True)
+        tree.scan()
+        groups = tree.duplicates
+
+        assert [group.paths for group in groups] == [
+            ["a/big.bin", "b/copy.bin", "b/hard.bin"],
+            ["a/small.txt", "b/small.txt"],
+        ]
+        # Harte Links belegen keinen zusätzlichen Platz
+        assert groups[0].wasted == 20000 and groups[1].wasted == 5
+        assert groups[0].digest == hash_file(os.path.join(tmpdir, "b", "copy.bin"))
+
+        lines = tree.tree_print().splitlines()
+        assert "│   ├── big.bin [duplicate #1]" in lines
+        assert "│   ├── small.txt [duplicate #2]" in lines
+        assert "│   └── tail.bin" in lines and "└── link.bin -> a/big.bin" in lines
+
+        document = json.loads(tree.render_json())
+        assert document["duplicates"][1] == {"size": 5, "digest": groups[1].digest,
+                                             "paths": ["a/small.txt", "b/small.txt"], "wasted": 5}
+
+
+def test_mmap_and_buffered_hashes_agree(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "data")
+        _write(path, os.urandom(3 * 1024 * 1024 + 17))
+        monkeypatch.setattr(duplicates, "MMAP_THRESHOLD", 0)
+        mapped = hash_file(path)
+        monkeypatch.setattr(duplicates, "MMAP_THRESHOLD", float("inf"))
+        assert hash_file(path) == mapped
+        files = [("x", path, os.path.getsize(path)), ("y", path + ".missing", os.path.getsize(path))]
+        assert find_duplicates(files) == []
+
+
+def test_cli_duplicates():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["--dir", tmpdir, "--duplicates"])
+        assert out.getvalue().count("[duplicate #1]") == 3
+
+        without = DirectoryTree(tmpdir)
+        without.scan()
+        assert "duplicates" not in json.loads(without.render_json())
@@ -0,0 +1,112 @@
+"""
+Tests for structured error accounting and the strict/lenient policy.
+"""
+
+import errno
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.directory_tree import main
+from dir_tree.entries import MARKER_ERROR
+
+
+def _make_tree(root):
+    os.makedirs(os.path.join(root, "stale", "inner"))
+    os.makedirs(os.path.join(root, "ok"))
+    with open(os.path.join(root, "ok", "file.txt"), "w") as f:
+        f.write("data")
+    os.symlink("missing.txt", os.path.join(root, "ok", "broken.txt"))
+    os.symlink("loop_b", os.path.join(root, "loop_a"))
+    os.symlink("loop_a", os.path.join(root, "loop_b"))
+
+
+@pytest.fixture
+def stale_scandir(monkeypatch):
+    """Let os.scandir fail with ESTALE for directories named 'stale', as on a stale NFS handle."""
+    real_scandir = os.scandir
+
+    def scandir(path):
+        if isinstance(path, str) and os.path.basename(path) == "stale":
+            raise OSError(errno.ESTALE, os.strerror(errno.ESTALE), path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+
+
+def test_lenient_records_errors(stale_scandir):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        tree = DirectoryTree(tmpdir, show_file_sizes=True)
+        tree.scan()
+
+        assert f"    └── {MARKER_ERROR}" in tree.tree_print().splitlines()
+        assert "ok" in tree.tree and "file.txt (4.0 B)" in tree.tree_print()
+        errors = {(os.path.relpath(e.path, tmpdir), e.phase, e.error) for e in tree.errors}
+        assert errors == {("stale", "list", "ESTALE")}
+        document = json.loads(tree.render_json())
+        assert document["error_counts"] == {"list": 1, "stat": 0, "size": 0, "type": 0, "total": 1}
+        assert {"path", "phase", "errno", "error", "message"} == set(document["errors"][0])
+
+
+def test_broken_symlink_is_not_an_error():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        os.makedirs(root)
+        with open(os.path.join(root, "file.txt"), "w") as f:
+            f.write("data")
+        os.symlink("missing.txt", os.path.join(root, "broken.txt"))
+        out_path = os.path.join(tmpdir, "out.ndjson")
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            assert main(["--dir", root, "--strict", "--format", "ndjson", "--output", out_path]) == 0
+        assert stderr.getvalue() == ""
+        with open(out_path, encoding="utf-8") as f:
+            records = {r["path"]: r for r in map(json.loads, f)}
+        assert records["broken.txt"]["size"] is None and records["file.txt"]["size"] == 4
+
+        tree = DirectoryTree(root, show_file_sizes=True)
+        tree.scan()
+        assert tree.errors == []
+        assert "├── broken.txt -> missing.txt" in tree.tree_print()
+
+
+def test_symlink_loop_is_not_an_error():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.symlink("loop", os.path.join(tmpdir, "loop"))
+        with open(os.path.join(tmpdir, "z.txt"), "w") as f:
+            f.write("data")
+        tree = DirectoryTree(tmpdir, show_file_sizes=True, strict=True)
+        tree.scan(keep_entries=True)
+        assert tree.errors == []
+        assert tree.tree_print().splitlines()[1:] == ["├── loop -> loop", "└── z.txt (4.0 B)"]
+        loop = next(e for e in tree.iter_entries() if e.path == "loop")
+        assert loop.kind == "file" and loop.size is None
+
+        stderr = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(stderr):
+            assert main(["--dir", tmpdir, "--strict", "--follow-symlinks-in-tree"]) == 0
+        assert stderr.getvalue() == ""
+
+
+def test_strict_aborts(stale_scandir):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        with pytest.raises(OSError) as info:
+            DirectoryTree(tmpdir, strict=True).scan()
+        assert info.value.errno == errno.ESTALE # Symlink-Schleifen sind keine Fehler
+
+        err = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(err):
+            assert main(["--dir", tmpdir, "--strict"]) == 1
+        assert os.strerror(errno.ESTALE) in err.getvalue()
+
+        err = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(err):
+            assert main(["--dir", tmpdir, "--lenient"]) == 0
+        assert "1 errors while scanning" in err.getvalue()
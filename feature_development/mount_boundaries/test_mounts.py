@@ -0,0 +1,154 @@
+"""
+Tests for --one-file-system, per-mount exclusion and per-device batch pools.
+"""
+
+import contextlib
+import errno
+import os
+import tempfile
+import threading
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.checkpoint import CancelToken, Checkpointer, ScanCancelled
+from dir_tree.mounts import excluded_mount_points, read_mounts
+from dir_tree.renderers import TreeSink
+
+
+def _other_device_dir():
+    """A directory on another device than the temp dir (e.g. /proc), or skip."""
+    for path in ("/proc", "/dev", "/sys"):
+        try:
+            if os.stat(path).st_dev != os.stat(tempfile.gettempdir()).st_dev:
+                return path
+        except OSError:
+            continue
+    pytest.skip("no directory on another device available")
+
+
+def test_one_file_system_stops_at_mount_points(monkeypatch):
+    other = _other_device_dir()
+    real_is_dir = DirectoryTree._entry_is_dir
+
+    def entry_is_dir(item, is_symlink):
+        if item.name == "z_fail":
+            raise OSError(errno.EIO, os.strerror(errno.EIO), item.path)
+        return real_is_dir(item, is_symlink)
+
+    # Fehler nach dem Mountpunkt: das Verzeichnis wird auf dem langsamen Pfad neu gebaut
+    monkeypatch.setattr(DirectoryTree, "_entry_is_dir", staticmethod(entry_is_dir))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.makedirs(os.path.join(tmpdir, "local", "sub"))
+        os.symlink(other, os.path.join(tmpdir, "mounted"))
+        open(os.path.join(tmpdir, "z_fail"), "w").close()
+
+        tree = DirectoryTree(tmpdir, follow_symlinks_in_tree=True, one_file_system=True)
+        tree.scan()
+        assert len(tree.errors) == 1
+        assert tree.tree["mounted"] == {} # gelistet, aber nicht betreten
+        assert tree.tree["local"] == {"sub": {}}
+        assert tree.mount_boundaries == [os.path.join(tmpdir, "mounted")]
+
+        tree = DirectoryTree(tmpdir, exclude_files={"[0-9]*"}, follow_symlinks_in_tree=True, max_depth=2)
+        tree.scan()
+        assert tree.tree["mounted"] and not tree.mount_boundaries
+
+
+def test_failed_stat_is_no_mount_boundary(monkeypatch):
+    real_scandir = os.scandir
+
+    def scandir(path):
+        # "gone" verschwindet zwischen Listen und stat(), wie bei einem parallel gelöschten Verzeichnis
+        with real_scandir(path) as it:
+            items = list(it)
+        for item in items:
+            if item.name == "gone":
+                os.rmdir(item.path)
+        return contextlib.nullcontext(items)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.makedirs(os.path.join(tmpdir, "gone"))
+        os.makedirs(os.path.join(tmpdir, "local"))
+        monkeypatch.setattr(os, "scandir", scandir)
+        tree = DirectoryTree(tmpdir, one_file_system=True)
+        tree.scan()
+        assert tree.mount_boundaries == []
+        assert ("gone", "stat") in {(os.path.basename(e.path), e.phase) for e in tree.errors}
+
+
+def test_mount_boundaries_survive_resume():
+    other = _other_device_dir()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        os.makedirs(root)
+        os.symlink(other, os.path.join(root, "a_mounted"))
+        for i in range(20):
+            os.makedirs(os.path.join(root, f"dir{i:02}", "sub"))
+        checkpoint = os.path.join(tmpdir, "scan.ckpt")
+        token = CancelToken()
+
+        class CancelAfterMount(TreeSink):
+            needs_size = True
+
+            def visit(self, entry):
+                if entry.name == "dir05":
+                    token.cancel()
+
+        first = DirectoryTree(root, follow_symlinks_in_tree=True, one_file_system=True)
+        first.tick_entries = 1
+        with pytest.raises(ScanCancelled):
+            first.walk([CancelAfterMount()], cancel=token, checkpoint=Checkpointer(checkpoint, interval=3600))
+        assert first.mount_boundaries == [os.path.join(root, "a_mounted")]
+
+        resumed = DirectoryTree(root, follow_symlinks_in_tree=True, one_file_system=True)
+        resumed.scan(checkpoint=Checkpointer(checkpoint, resume=True))
+        assert resumed.mount_boundaries == [os.path.join(root, "a_mounted")]
+
+
+def test_exclude_mounts():
+    mounts = {"/": "ext4", "/proc": "proc", "/mnt/nfs": "nfs4", "/mnt/nfs2": "nfs4"}
+    assert excluded_mount_points(["nfs4", "/srv/backup"], mounts) == {"/mnt/nfs", "/mnt/nfs2", "/srv/backup"}
+    assert excluded_mount_points(["cifs"], mounts) == set()
+    assert all(isinstance(fstype, str) for fstype in read_mounts().values())
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.makedirs(os.path.join(tmpdir, "data", "backup"))
+        os.makedirs(os.path.join(tmpdir, "data", "keep"))
+        tree = DirectoryTree(tmpdir, exclude_mounts={os.path.join(tmpdir, "data", "backup")})
+        tree.scan()
+        assert tree.tree == {"data": {"keep": {}}}
+
+        # Über einen Symlink erreicht: verglichen wird (st_dev, st_ino), nicht der Pfad
+        root = os.path.join(tmpdir, "root_link")
+        os.symlink(tmpdir, root)
+        os.symlink("backup", os.path.join(tmpdir, "data", "alias"))
+        excluded = {os.path.join(tmpdir, "data", "backup")}
+        tree = DirectoryTree(root, exclude_files={"root_link"}, exclude_mounts=excluded)
+        tree.scan()
+        assert sorted(tree.tree["data"]) == ["alias", "keep"] # Symlink wird nicht betreten, bleibt gelistet
+        assert tree.tree["data"]["alias"]["_type"] == "dir_symlink_no_follow"
+        tree = DirectoryTree(root, exclude_files={"root_link"}, follow_symlinks_in_tree=True, exclude_mounts=excluded)
+        tree.scan()
+        assert tree.tree == {"data": {"keep": {}}}
+
+
+def test_batch_uses_one_pool_per_device(monkeypatch):
+    other = _other_device_dir()
+    threads = {}
+
+    def scan(self, *args, **kwargs):
+        threads[self.root_dir] = threading.current_thread().name
+        return {}
+
+    monkeypatch.setattr(DirectoryTree, "scan", scan)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.makedirs(os.path.join(tmpdir, "a"))
+        os.makedirs(os.path.join(tmpdir, "b"))
+        roots = [os.path.join(tmpdir, "a"), os.path.join(tmpdir, "b"), other]
+        assert len(list(DirectoryTree.batch(roots, max_workers=1))) == 3
+
+        local_dev = os.stat(tmpdir).st_dev
+        prefix = lambda root: threads[root].rsplit("_", 1)[0]
+        assert prefix(roots[0]) == prefix(roots[1]) == f"dir-tree-dev{local_dev}"
+        assert prefix(other) == f"dir-tree-dev{os.stat(other).st_dev}"
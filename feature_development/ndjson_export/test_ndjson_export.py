@@ -0,0 +1,122 @@
+"""
+Tests for the flat NDJSON export with stat metadata and compressed output.
+"""
+
+import base64
+import gzip
+import json
+import os
+import stat
+import tempfile
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.directory_tree import main
+from dir_tree.renderers import NdjsonSink, open_output
+from dir_tree.snapshot import Snapshot
+
+
+def _make_tree(root):
+    os.makedirs(os.path.join(root, "data"))
+    with open(os.path.join(root, "data", "rows.csv"), "wb") as f:
+        f.write(b"a,b\n" * 100)
+    os.symlink("data/rows.csv", os.path.join(root, "latest.csv"))
+
+
+def test_records_carry_stat_metadata():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        out_path = os.path.join(tmpdir, "out.ndjson")
+        with open_output(out_path) as out:
+            DirectoryTree(tmpdir, exclude_files={"out.ndjson"}).walk([NdjsonSink(out)])
+        with open(out_path, encoding="utf-8") as f:
+            records = {r["path"]: r for r in map(json.loads, f)}
+
+        rows = records["data/rows.csv"]
+        st = os.lstat(os.path.join(tmpdir, "data", "rows.csv"))
+        assert rows["size"] == 400
+        assert rows["inode"] == st.st_ino
+        assert rows["mtime"] == st.st_mtime
+        assert stat.S_ISREG(rows["mode"])
+
+        link = records["latest.csv"]
+        assert link["target"] == "data/rows.csv"
+        assert link["size"] == 400 # Größe des Ziels, wie in tree_print
+        assert stat.S_ISLNK(link["mode"]) # Metadaten des Symlinks selbst
+        assert records["data"]["type"] == "dir" and stat.S_ISDIR(records["data"]["mode"])
+
+
+def test_cli_gzip_export():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        os.makedirs(root)
+        _make_tree(root)
+        out_path = os.path.join(tmpdir, "tree.ndjson.gz")
+        assert main(["--dir", root, "--format", "ndjson", "--output", out_path]) == 0
+        with gzip.open(out_path, "rt", encoding="utf-8") as f:
+            paths = [json.loads(line)["path"] for line in f]
+        assert paths == ["data", "data/rows.csv", "latest.csv"]
+
+
+@pytest.mark.parametrize("suffix", [".ndjson", ".ndjson.gz"])
+def test_undecodable_file_names_are_exported(suffix):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        os.makedirs(root)
+        try:
+            open(os.path.join(os.fsencode(root), b"bad\xff.txt"), "wb").close()
+            os.symlink(b"bad\xff.txt", os.path.join(os.fsencode(root), b"link"))
+        except OSError:
+            pytest.skip("file system does not accept non-UTF-8 names")
+        open(os.path.join(root, "ok.txt"), "w").close()
+        out_path = os.path.join(tmpdir, "out" + suffix)
+        assert main(["--dir", root, "--format", "ndjson", "--output", out_path]) == 0
+        with (gzip.open if suffix.endswith(".gz") else open)(out_path, "rt", encoding="utf-8") as f:
+            records = {r["path"]: r for r in map(json.loads, f)}
+
+        bad = records["bad\ufffd.txt"]
+        assert base64.b64decode(bad["path_bytes"]) == b"bad\xff.txt"
+        assert base64.b64decode(records["link"]["target_bytes"]) == b"bad\xff.txt"
+        assert "path_bytes" not in records["ok.txt"] and "path_bytes" not in records["link"]
+
+
+def test_undecodable_file_names_in_csv():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        os.makedirs(root)
+        try:
+            open(os.path.join(os.fsencode(root), b"bad\xff.txt"), "wb").close()
+        except OSError:
+            pytest.skip("file system does not accept non-UTF-8 names")
+        out_path = os.path.join(tmpdir, "out.csv")
+        assert main(["--dir", root, "--format", "csv", "--output", out_path]) == 0
+        with open(out_path, "rb") as f:
+            assert b"bad\xff.txt" in f.read()
+
+
+def test_snapshot_lookup_of_undecodable_names():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        os.makedirs(root)
+        names = [b"a", "é".encode("utf-8"), b"\x80x", b"\x81y", b"z"]
+        try:
+            for name in names:
+                open(os.path.join(os.fsencode(root), name), "wb").close()
+        except OSError:
+            pytest.skip("file system does not accept non-UTF-8 names")
+        tree = DirectoryTree(root)
+        tree.scan(keep_entries=True)
+        snap_path = os.path.join(tmpdir, "tree.snap")
+        tree.write_snapshot(snap_path)
+        with Snapshot(snap_path) as snap:
+            assert snap.tree_print() == tree.tree_print()
+            for name in map(os.fsdecode, names):
+                assert snap.entry(name).name == name
+            assert sorted(snap.iter_prefix("")) == sorted([""] + [os.fsdecode(n) for n in names])
+
+
+def test_unknown_compression_is_rejected():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(ValueError):
+            open_output(os.path.join(tmpdir, "x"), "lz4")
@@ -0,0 +1,105 @@
+"""
+Tests for TreeIndex queries and the glob/size helpers.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.query import TreeIndex, glob_to_regex, parse_size
+from dir_tree.snapshot import Snapshot
+
+
+def _make_tree(root):
+    files = {
+        "lib/libfoo.so": 12 * 1024 * 1024,
+        "lib/libbar.so": 1024,
+        "lib/LIBBIG.SO": 20 * 1024 * 1024,
+        "src/app/tests/test_app.py": 10,
+        "src/tests/test_root.py": 20,
+        "src/app/main.py": 300,
+        "README.md": 5,
+    }
+    for rel, size in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.truncate(size)
+
+
+def _index(root):
+    tree = DirectoryTree(root)
+    tree.scan(keep_entries=True)
+    return TreeIndex(tree.iter_entries())
+
+
+def test_parse_size():
+    assert parse_size("512") == 512
+    assert parse_size("10MB") == 10 * 1024 * 1024
+    assert parse_size("1.5 kb") == 1536
+    with pytest.raises(ValueError):
+        parse_size("ten")
+
+
+def test_glob_to_regex():
+    assert glob_to_regex("src/**/tests").match("src/tests")
+    assert glob_to_regex("src/**/tests").match("src/app/tests")
+    assert not glob_to_regex("src/*/tests").match("src/a/b/tests")
+    assert glob_to_regex("*.py").match("main.py")
+    assert not glob_to_regex("*.py").match("src/main.py")
+    assert glob_to_regex("test_[!x]?.py").match("test_ab.py")
+
+
+def test_find_by_extension_and_size():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        index = _index(tmpdir)
+        big = index.find(glob="*.so", min_size=parse_size("10MB"), type="file")
+        assert [e.path for e in big] == ["lib/libfoo.so"]
+        assert [e.path for e in index.find(glob="*.[sS][oO]")] == ["lib/LIBBIG.SO", "lib/libbar.so", "lib/libfoo.so"]
+        assert [e.path for e in index.find(max_size=10, type="file")] == ["README.md", "src/app/tests/test_app.py"]
+
+
+def test_find_by_extension_with_several_dots_and_dotfiles():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.makedirs(os.path.join(tmpdir, "conf.d"))
+        for name in ("backup.tar.gz", "notes.gz", ".bashrc", "old.bashrc"):
+            open(os.path.join(tmpdir, name), "w").close()
+        index = _index(tmpdir)
+        assert [e.path for e in index.find(glob="*.tar.gz")] == ["backup.tar.gz"]
+        assert [e.path for e in index.find(glob="*.gz")] == ["backup.tar.gz", "notes.gz"]
+        assert [e.path for e in index.find(glob="*.bashrc")] == [".bashrc", "old.bashrc"]
+        assert [e.path for e in index.find(glob="*.d")] == ["conf.d"]
+
+
+def test_find_by_path_glob_and_under():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        index = _index(tmpdir)
+        assert [e.path for e in index.find(glob="src/**/tests")] == ["src/app/tests", "src/tests"]
+        assert [e.path for e in index.find(glob="src/**/tests/*.py")] == \
+            ["src/app/tests/test_app.py", "src/tests/test_root.py"]
+        assert [e.path for e in index.under("src/app")] == \
+            ["src/app/main.py", "src/app/tests", "src/app/tests/test_app.py"]
+        assert len(index.find(glob="src/**", limit=2)) == 2
+
+
+def test_largest_directories_and_snapshot_source():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "root")
+        _make_tree(root)
+        index = _index(root)
+        largest = index.largest(2, type="dir")
+        assert [e.path for e in largest] == ["lib", "src"]
+        assert largest[0].size == 32 * 1024 * 1024 + 1024
+        assert index.largest(1)[0].path == "lib/LIBBIG.SO"
+
+        tree = DirectoryTree(root)
+        tree.scan(keep_entries=True)
+        snap_path = os.path.join(tmpdir, "tree.snap")
+        tree.write_snapshot(snap_path)
+        with Snapshot(snap_path) as snap:
+            from_snapshot = TreeIndex(snap.iter_entries())
+        assert from_snapshot.entries == index.entries
@@ -0,0 +1,107 @@
+"""
+Tests for rate-limited progress reporting.
+"""
+
+import io
+import os
+import tempfile
+import time
+
+from dir_tree import DirectoryTree
+from dir_tree.progress import ProgressPrinter, ScanProgress
+
+
+def _make_tree(root):
+    for i in range(4):
+        for j in range(3):
+            path = os.path.join(root, f"dir{i}", f"sub{j}")
+            os.makedirs(path)
+            for k in range(5):
+                with open(os.path.join(path, f"f{k}.bin"), "wb") as f:
+                    f.write(b"x" * 100)
+
+
+def test_progress_reports():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        reports = []
+        tree = DirectoryTree(tmpdir, show_file_sizes=True)
+        tree.tick_entries = 5
+        tree.scan(progress=reports.append, progress_interval=0)
+
+        final = reports[-1]
+        assert final.done and sum(report.done for report in reports) == 1
+        assert final.entries == 4 + 12 + 60
+        assert final.bytes_sized == 60 * 100 # show_file_sizes fordert die Größen an
+        assert final.dirs_listed == 1 + 4 + 12 and final.dirs_pending == 0
+        assert any(report.dirs_pending > 0 for report in reports[:-1])
+        assert all(report.current_path.startswith(tmpdir) for report in reports)
+        entries = [report.entries for report in reports]
+        assert entries == sorted(entries)
+
+        # Ohne Größenbedarf werden keine Dateien gestatet
+        reports = []
+        DirectoryTree(tmpdir).scan(build_dict=False, progress=reports.append)
+        assert reports[-1].bytes_sized == 0 and reports[-1].entries == 76
+
+
+def test_rate_limit_and_printer():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        reports = []
+        tree = DirectoryTree(tmpdir)
+        tree.tick_entries = 1
+        tree.scan(progress=reports.append, progress_interval=3600)
+        assert len(reports) == 1 # nur der Abschlussbericht
+
+    out = io.StringIO()
+    printer = ProgressPrinter(out)
+    printer(ScanProgress(1500, 10, 3, 2048, "/data/x", 2.0, 750.0, False))
+    printer(ScanProgress(2000, 12, 0, 4096, "/data", 2.5, 800.0, True))
+    lines = out.getvalue().splitlines()
+    assert lines == [
+        "1,500 entries (750/s), 3 dirs pending, 2.0 KB sized, 2s: /data/x",
+        "Done: 2,000 entries (800/s), 0 dirs pending, 4.0 KB sized, 2s",
+    ]
+    assert "no update for 7s" in ProgressPrinter.format(
+        ScanProgress(1500, 10, 3, 2048, "/nfs/stuck", 9.0, 0.0, False), stalled=7.0)
+
+
+def test_reports_during_slow_listings(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(10):
+            os.makedirs(os.path.join(tmpdir, f"d{i}"))
+        list_dir = DirectoryTree._list_dir
+
+        def slow_list_dir(self, current_dir):
+            time.sleep(0.03) # z.B. ein langsamer NFS-Mount
+            return list_dir(self, current_dir)
+
+        monkeypatch.setattr(DirectoryTree, "_list_dir", slow_list_dir)
+        reports = []
+        listed = []
+
+        class Recorder:
+            __call__ = staticmethod(reports.append)
+            listing = staticmethod(listed.append)
+
+        DirectoryTree(tmpdir).scan(progress=Recorder(), progress_interval=0.05)
+
+        # Weniger als tick_entries Einträge, trotzdem Zwischenberichte
+        interim = reports[:-1]
+        assert len(interim) >= 2
+        # Der gemeldete Pfad ist das Verzeichnis, dessen Listing gerade beginnt
+        assert all(report.current_path in listed for report in interim)
+        assert interim[-1].current_path != tmpdir
+        assert listed == [tmpdir] + [os.path.join(tmpdir, f"d{i}") for i in range(10)]
+
+
+def test_printer_stall_line_shows_the_hanging_listing():
+    printer = ProgressPrinter(io.StringIO())
+    printer.listing("/nfs")
+    assert printer.stall_line(6.0) == "0 entries (0/s), 0 dirs pending, 0.0 B sized, 6s, no update for 6s: /nfs"
+    printer(ScanProgress(1500, 10, 3, 2048, "/nfs", 2.0, 750.0, False))
+    printer.listing("/nfs/stuck")
+    assert printer.stall_line(7.0).endswith("no update for 7s: /nfs/stuck")
+    printer(ScanProgress(2000, 12, 0, 4096, "/nfs", 2.5, 800.0, True))
+    assert printer.stall_line(8.0) is None
@@ -0,0 +1,101 @@
+"""
+Tests for the single-traversal renderer interface.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+
+from dir_tree import DirectoryTree
+from dir_tree.renderers import (TreeSink, TreeDictSink, TreePrintSink, NdjsonSink,
+                                CsvSink, MarkdownSink, HtmlSink)
+
+
+def _make_tree(root):
+    os.makedirs(os.path.join(root, "src", "pkg"))
+    for rel, size in {"README.md": 100, "src/main.py": 1536, "src/pkg/util.py": 7}.items():
+        with open(os.path.join(root, rel), "wb") as f:
+            f.write(b"x" * size)
+    os.symlink("src/pkg", os.path.join(root, "pkg_link"))
+
+
+class CountingSink(TreeSink):
+    def __init__(self):
+        self.events = []
+
+    def start(self, tree):
+        self.events.append("start")
+
+    def visit(self, entry):
+        self.events.append(("visit", entry.path, entry.size))
+
+    def leave(self, entry):
+        self.events.append(("leave", entry.path))
+
+    def finish(self, tree):
+        self.events.append("finish")
+
+
+def test_one_walk_feeds_all_sinks():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        tree = DirectoryTree(tmpdir, show_file_sizes=True)
+        dict_sink, print_sink = TreeDictSink(), TreePrintSink(show_file_sizes=True)
+        ndjson_out, csv_out = io.StringIO(), io.StringIO()
+        tree.walk([dict_sink, print_sink, NdjsonSink(ndjson_out, with_stat=False), CsvSink(csv_out)])
+
+        reference = DirectoryTree(tmpdir, show_file_sizes=True)
+        reference.scan()
+        assert dict_sink.tree == reference.tree
+        assert print_sink.lines == reference.tree_print_lines
+
+        records = [json.loads(line) for line in ndjson_out.getvalue().splitlines()]
+        assert [r["path"] for r in records] == ["README.md", "pkg_link", "src", "src/main.py",
+                                                "src/pkg", "src/pkg/util.py"]
+        assert records[3]["size"] == 1536
+        assert records[1] == {"path": "pkg_link", "depth": 1, "type": "dir_symlink_no_follow",
+                              "size": None, "target": "src/pkg"}
+        rows = list(csv.reader(io.StringIO(csv_out.getvalue())))
+        assert rows[0] == ["path", "depth", "type", "size", "target"]
+        assert rows[1:] == [[r["path"], str(r["depth"]), r["type"],
+                             "" if r["size"] is None else str(r["size"]), r["target"] or ""] for r in records]
+
+
+def test_sizes_are_only_looked_up_when_needed():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        sink = CountingSink()
+        DirectoryTree(tmpdir).walk([sink, TreePrintSink()])
+        assert sink.events[0] == "start" and sink.events[-1] == "finish"
+        assert all(event[2] is None for event in sink.events if event[0] == "visit")
+        assert ("leave", "src/pkg") in sink.events
+
+
+def test_markdown_and_html():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "my_project")
+        os.makedirs(root)
+        _make_tree(root)
+        md_out, html_out = io.StringIO(), io.StringIO()
+        DirectoryTree(root, max_depth=1).walk([MarkdownSink(md_out), HtmlSink(html_out)])
+        assert md_out.getvalue().splitlines() == [
+            "**my\\_project/**",
+            "",
+            "- README.md",
+            "- pkg\\_link -> src/pkg",
+            "- src/",
+        ]
+        page = html_out.getvalue()
+        assert page.count("<ul>") == page.count("</ul>") == 1
+        assert '<li class="dir">pkg_link -&gt; src/pkg</li>' in page
+
+
+def test_build_tree_recursive_still_works():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        tree = DirectoryTree(tmpdir)
+        subtree = tree.build_tree_recursive(os.path.join(tmpdir, "src"), prefix="    ")
+        assert subtree == {"main.py": None, "pkg": {"util.py": None}}
+        assert tree.tree_print_lines == ["    ├── main.py", "    └── pkg", "        └── util.py"]
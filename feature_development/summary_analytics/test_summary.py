@@ -0,0 +1,91 @@
+"""
+Tests for the vectorized size and structure summary (--summary).
+"""
+
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.analytics import SummarySink, format_summary, np
+from dir_tree.directory_tree import main
+from dir_tree.entries import ScanEntry
+
+SIZES = {"a.txt": 0, "b.txt": 100, "c.PY": 3000, "sub/d.py": 3000, "sub/deep/e.bin": 70000, "noext": 1}
+
+
+def _make_tree(root):
+    for rel, size in SIZES.items():
+        path = os.path.join(root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+
+
+def _summarize(root, use_numpy, top_n=3):
+    sink = SummarySink(use_numpy=use_numpy)
+    DirectoryTree(root).walk([sink])
+    return sink.summary(top_n)
+
+
+def test_summary_python():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        summary = _summarize(tmpdir, use_numpy=False)
+
+        assert (summary["files"], summary["dirs"], summary["sized_files"]) == (6, 2, 6)
+        assert summary["total_size"] == sum(SIZES.values())
+        # Nearest rank über [0, 1, 100, 3000, 3000, 70000]
+        assert summary["size_percentiles"] == {"p50": 100, "p90": 70000, "p99": 70000, "max": 70000}
+        assert [(b["min"], b["max"], b["count"]) for b in summary["size_histogram"]] == [
+            (0, 0, 1), (1, 1, 1), (64, 127, 1), (2048, 4095, 2), (65536, 131071, 1)]
+        # Gleich große Dateien in Baumreihenfolge
+        assert summary["largest_files"] == [
+            {"path": "sub/deep/e.bin", "size": 70000},
+            {"path": "c.PY", "size": 3000},
+            {"path": "sub/d.py", "size": 3000},
+        ]
+        assert summary["extensions"][:2] == [
+            {"extension": ".bin", "count": 1, "size": 70000},
+            {"extension": ".py", "count": 2, "size": 6000},
+        ]
+        assert summary["depth_counts"] == {1: 5, 2: 2, 3: 1}
+
+
+def test_summary_numpy_matches_python():
+    pytest.importorskip("numpy")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        for top_n in (0, 2, 3, 10):
+            assert _summarize(tmpdir, True, top_n) == _summarize(tmpdir, False, top_n)
+
+
+def test_top_files_with_many_equal_sizes():
+    sinks = [SummarySink(use_numpy=False)]
+    if np is not None:
+        sinks.append(SummarySink(use_numpy=True))
+    for sink in sinks:
+        for i in range(1000):
+            sink.visit(ScanEntry(f"f{i:04}", f"f{i:04}", 1, "file", 0 if i % 3 else 4096, None, "", False, False))
+        top = sink.summary(top_n=5)["largest_files"]
+        # Gleichstand am Schwellwert: die ersten in Baumreihenfolge
+        assert [item["path"] for item in top] == ["f0000", "f0003", "f0006", "f0009", "f0012"]
+        assert sink.summary(top_n=400)["largest_files"][-1] == {"path": "f0098", "size": 0}
+
+
+def test_cli_summary():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["--dir", tmpdir, "--summary", "--format", "json", "--top", "1"])
+        summary = json.loads(out.getvalue())
+        assert summary["largest_files"] == [{"path": "sub/deep/e.bin", "size": 70000}]
+        assert "Largest files:" in format_summary(_summarize(tmpdir, use_numpy=False))
+
+        with pytest.raises(SystemExit):
+            main(["--dir", tmpdir, "--summary", "--format", "csv"])
@@ -0,0 +1,119 @@
+"""
+Tests for the structural tree diff.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from dir_tree import DirectoryTree
+from dir_tree.diff import diff_trees, ADDED, REMOVED, RESIZED, RETYPED, RETARGETED
+from dir_tree.snapshot import Snapshot
+
+
+def _write(path, data=b""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _scan(root):
+    tree = DirectoryTree(root)
+    tree.scan(keep_entries=True)
+    return tree
+
+
+def test_reports_each_kind_of_change():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "deploy")
+        _write(os.path.join(root, "app", "bin", "run"), b"v1")
+        _write(os.path.join(root, "app", "lib", "core.so"), b"x" * 10)
+        _write(os.path.join(root, "cache", "a", "b"), b"")
+        _write(os.path.join(root, "config.yml"), b"a: 1")
+        _write(os.path.join(root, "targets", "one"), b"")
+        _write(os.path.join(root, "targets", "two"), b"")
+        os.symlink("targets/one", os.path.join(root, "current"))
+        before = _scan(root)
+        snap_path = os.path.join(tmpdir, "before.snap")
+        before.write_snapshot(snap_path)
+
+        shutil.rmtree(os.path.join(root, "cache"))
+        _write(os.path.join(root, "app", "lib", "core.so"), b"x" * 20)
+        _write(os.path.join(root, "app", "lib", "extra.so"), b"")
+        os.remove(os.path.join(root, "config.yml"))
+        os.symlink("targets/one", os.path.join(root, "config.yml"))
+        os.remove(os.path.join(root, "current"))
+        os.symlink("targets/two", os.path.join(root, "current"))
+        after = _scan(root)
+
+        with Snapshot(snap_path) as old:
+            result = diff_trees(old, after)
+            assert [(c.path, c.change) for c in result.changes] == [
+                ("app/lib/core.so", RESIZED),
+                ("app/lib/extra.so", ADDED),
+                ("cache", REMOVED),
+                ("config.yml", RETYPED),
+                ("current", RETARGETED),
+            ]
+        assert result.tree_print() == "\n".join([
+            "deploy",
+            "├── app",
+            "│   └── lib",
+            "│       ├── [~] core.so (10.0 B -> 20.0 B)",
+            "│       └── [+] extra.so",
+            "├── [-] cache/",
+            "├── [T] config.yml (file -> file_symlink)",
+            "└── [>] current (targets/one -> targets/two)",
+        ])
+        assert result.counts()[REMOVED] == 1
+
+
+def test_identical_trees_have_no_changes():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write(os.path.join(tmpdir, "a", "b.txt"), b"1")
+        result = diff_trees(_scan(tmpdir), _scan(tmpdir))
+        assert not result
+        assert result.tree_print() == os.path.basename(tmpdir)
+
+
+def test_directory_replaced_by_file():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write(os.path.join(tmpdir, "out", "x"), b"")
+        _write(os.path.join(tmpdir, "out", "y"), b"")
+        _write(os.path.join(tmpdir, "z"), b"")
+        before = _scan(tmpdir)
+        shutil.rmtree(os.path.join(tmpdir, "out"))
+        _write(os.path.join(tmpdir, "out"), b"")
+        result = diff_trees(before, _scan(tmpdir))
+        assert [(c.path, c.change) for c in result.changes] == [("out", RETYPED)]
+
+
+def test_diff_of_two_scans_uses_the_scanned_state():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write(os.path.join(tmpdir, "f"), b"v1")
+        _write(os.path.join(tmpdir, "one"), b"")
+        _write(os.path.join(tmpdir, "two"), b"")
+        os.symlink("one", os.path.join(tmpdir, "l"))
+        old = _scan(tmpdir)
+
+        _write(os.path.join(tmpdir, "f"), b"version 2")
+        os.remove(os.path.join(tmpdir, "l"))
+        os.symlink("two", os.path.join(tmpdir, "l"))
+        new = _scan(tmpdir)
+
+        result = diff_trees(old, new)
+        assert [(c.path, c.change) for c in result.changes] == [("f", RESIZED), ("l", RETARGETED)]
+        assert (result.changes[0].old.size, result.changes[0].new.size) == (2, 9)
+        assert (result.changes[1].old.target, result.changes[1].new.target) == ("one", "two")
+
+
+def test_entries_are_only_kept_on_request():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write(os.path.join(tmpdir, "f"), b"v1")
+        tree = DirectoryTree(tmpdir)
+        tree.to_json()
+        assert tree.entries is None
+        with pytest.raises(ValueError):
+            tree.iter_entries()
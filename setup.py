@@ -7,6 +7,9 @@ setup(
     version='0.2.0',
     packages=find_packages(),
     install_requires=[],  # Add any dependencies here
+    extras_require={
+        'zstd': ['zstandard'],  # --compress zstd
+    },
     entry_points={
         'console_scripts': [
             'dir-tree=dir_tree.directory_tree:main',  # Adds `dir-tree` command to the CLI